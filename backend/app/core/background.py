@@ -0,0 +1,85 @@
+import logging
+import threading
+from collections.abc import Callable, Iterable
+from contextlib import asynccontextmanager
+from typing import Protocol
+
+from starlette.concurrency import run_in_threadpool
+
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundWorker(Protocol):
+    def start(self): ...
+
+    def stop(self): ...
+
+
+class PeriodicWorker:
+    """Calls ``fn`` every ``interval`` seconds on a daemon thread.
+
+    ``stop`` wakes the thread, waits for the current run and then, unless
+    ``final_run`` is False, calls ``fn`` one last time so work buffered in
+    memory is written out on shutdown. Exceptions are logged and the loop
+    keeps going. An ``interval`` of 0 or less disables the worker.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], object], final_run: bool = True):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.final_run = final_run
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run_once(self):
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("Background worker %s failed", self.name)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._run_once()
+
+    def start(self):
+        if self.running or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+        if self.final_run:
+            self._run_once()
+
+
+def workers_lifespan(workers: Iterable[BackgroundWorker]):
+    """FastAPI lifespan that runs ``workers`` for as long as the app is up.
+
+    A worker is anything with blocking ``start`` and ``stop`` methods, such
+    as a ``PeriodicWorker`` or the password hasher's process pool.
+    """
+    workers = list(workers)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        for worker in workers:
+            await run_in_threadpool(worker.start)
+        try:
+            yield
+        finally:
+            for worker in workers:
+                await run_in_threadpool(worker.stop)
+
+    return lifespan
@@ -0,0 +1,84 @@
+import json
+import logging
+from collections import defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+
+from app.core.config import CACHE_EVENT_PEERS
+from app.core.internal_auth import SIGNATURE_HEADER, sign_payload
+
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = "/_internal/cache-events"
+
+# Topics published after committed writes. ``key`` is the affected id, or
+# None when everything under the topic may be stale.
+EXAM = "exam"
+CLASS = "class"
+QUESTION = "question"
+# Keyed by account_key(role, user_id).
+ACCOUNT = "account"
+# Keyed by enrollment_key(class_id, student_id); "<class_id>:*" for a whole class.
+ENROLLMENT = "enrollment"
+# Keyed by exam_session_key(exam_id, student_id); published when a session
+# is submitted so buffered autosaves are flushed and dropped.
+EXAM_SESSION = "exam_session"
+
+_listeners: dict[str, list[Callable[[Any], None]]] = defaultdict(list)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="cache-events")
+
+
+def account_key(role: str, user_id: int) -> str:
+    return f"{role}:{user_id}"
+
+
+def enrollment_key(class_id: int, student_id: int | None = None) -> str:
+    return f"{class_id}:{'*' if student_id is None else student_id}"
+
+
+def exam_session_key(exam_id: int, student_id: int) -> str:
+    return f"{exam_id}:{student_id}"
+
+
+def subscribe(topic: str, listener: Callable[[Any], None]):
+    _listeners[topic].append(listener)
+
+
+def dispatch(topic: str, key: Any = None):
+    """Run the listeners registered in this process."""
+    for listener in list(_listeners.get(topic, ())):
+        try:
+            listener(key)
+        except Exception:
+            logger.exception("Cache listener failed for topic %s", topic)
+
+
+def _send_to_peers(body: bytes):
+    headers = {
+        "content-type": "application/json",
+        SIGNATURE_HEADER: sign_payload(body),
+    }
+    with httpx.Client(timeout=1.0) as client:
+        for peer in CACHE_EVENT_PEERS:
+            try:
+                client.post(f"{peer.rstrip('/')}{EVENTS_PATH}", content=body, headers=headers)
+            except httpx.HTTPError:
+                # Peers fall back on their cache TTLs.
+                logger.warning("Could not deliver cache event to %s", peer)
+
+
+def publish(topic: str, key: Any = None):
+    """Invalidate caches for ``topic``/``key`` here and in CACHE_EVENT_PEERS.
+
+    Call after the write is committed. Delivery to peers is best effort and
+    asynchronous, so every cache that listens must also bound staleness with
+    a TTL.
+    """
+    dispatch(topic, key)
+    if CACHE_EVENT_PEERS:
+        body = json.dumps({"topic": topic, "key": key}).encode("utf-8")
+        _executor.submit(_send_to_peers, body)
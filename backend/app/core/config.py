@@ -17,3 +17,70 @@ DEFAULT_CORS_ORIGINS = [
 CORS_ORIGINS = _parse_csv_env(
     os.getenv("CORS_ORIGINS", ",".join(DEFAULT_CORS_ORIGINS))
 )
+
+# Signed identity headers forwarded by the API gateway to the services.
+INTERNAL_AUTH_SECRET = os.getenv("INTERNAL_AUTH_SECRET", SECRET_KEY)
+INTERNAL_AUTH_MAX_AGE_SECONDS = int(os.getenv("INTERNAL_AUTH_MAX_AGE_SECONDS", "30"))
+
+# Base URLs (gateway and services) that receive cache invalidation events.
+CACHE_EVENT_PEERS = _parse_csv_env(os.getenv("CACHE_EVENT_PEERS", ""))
+
+# Principals resolved from bearer tokens are cached per (role, user_id).
+# Account changes invalidate them; the TTL bounds staleness otherwise.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "30"))
+
+# Student <-> class membership index (app.services.class_membership).
+CLASS_MEMBERSHIP_CACHE_SIZE = int(os.getenv("CLASS_MEMBERSHIP_CACHE_SIZE", "50000"))
+CLASS_MEMBERSHIP_TTL_SECONDS = float(os.getenv("CLASS_MEMBERSHIP_TTL_SECONDS", "300"))
+
+# bcrypt runs on a dedicated process pool (app.core.password_hasher); at most
+# PASSWORD_HASH_MAX_QUEUE jobs may wait before requests are rejected with 503.
+# PASSWORD_HASH_WORKERS is per service process (default 2, fewer on smaller
+# machines); PASSWORD_HASH_WORKERS=0 uses a thread pool instead of processes.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 2))))
+PASSWORD_HASH_MAX_QUEUE = int(
+    os.getenv("PASSWORD_HASH_MAX_QUEUE", str(max(PASSWORD_HASH_WORKERS, 1) * 16))
+)
+
+# Exam -> allowed classes index (app.services.exam_access); 0 disables it.
+EXAM_ACCESS_CACHE_SIZE = int(os.getenv("EXAM_ACCESS_CACHE_SIZE", "10000"))
+EXAM_ACCESS_TTL_SECONDS = float(os.getenv("EXAM_ACCESS_TTL_SECONDS", "300"))
+
+# Compiled question papers of published exams (app.services.exam_paper). A
+# cached paper is re-checked against the exam's revisions once it is older
+# than EXAM_PAPER_REVALIDATE_SECONDS, so edits show up even without peers.
+EXAM_PAPER_CACHE_SIZE = int(os.getenv("EXAM_PAPER_CACHE_SIZE", "1000"))
+EXAM_PAPER_TTL_SECONDS = float(os.getenv("EXAM_PAPER_TTL_SECONDS", "3600"))
+EXAM_PAPER_REVALIDATE_SECONDS = float(os.getenv("EXAM_PAPER_REVALIDATE_SECONDS", "5"))
+
+# Exam autosaves (app.services.exam_session_store): "behind" buffers them and
+# writes every AUTOSAVE_FLUSH_INTERVAL_SECONDS, so a crash can lose up to one
+# interval; "through" writes each autosave before answering.
+AUTOSAVE_WRITE_MODE = os.getenv("AUTOSAVE_WRITE_MODE", "behind").strip().lower()
+AUTOSAVE_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUTOSAVE_FLUSH_INTERVAL_SECONDS", "2"))
+AUTOSAVE_BUFFER_MAX_SESSIONS = int(os.getenv("AUTOSAVE_BUFFER_MAX_SESSIONS", "20000"))
+
+# Proctoring violations are queued (app.services.violation_queue) and written
+# in batches; repeats within one flush interval collapse into one row.
+VIOLATION_FLUSH_INTERVAL_SECONDS = float(os.getenv("VIOLATION_FLUSH_INTERVAL_SECONDS", "1"))
+VIOLATION_QUEUE_MAX_ENTRIES = int(os.getenv("VIOLATION_QUEUE_MAX_ENTRIES", "50000"))
+
+# Answer keys used to grade submissions (app.services.answer_keys).
+ANSWER_KEY_CACHE_SIZE = int(os.getenv("ANSWER_KEY_CACHE_SIZE", "1000"))
+ANSWER_KEY_TTL_SECONDS = float(os.getenv("ANSWER_KEY_TTL_SECONDS", "3600"))
+
+# Caches for exams starting within PREWARM_LEAD_SECONDS are loaded ahead of
+# time, checked every PREWARM_INTERVAL_SECONDS (0 disables prewarming).
+PREWARM_LEAD_SECONDS = float(os.getenv("PREWARM_LEAD_SECONDS", "600"))
+PREWARM_INTERVAL_SECONDS = float(os.getenv("PREWARM_INTERVAL_SECONDS", "30"))
+
+# Open exam sessions are auto-submitted DEADLINE_GRACE_SECONDS after their
+# time runs out (app.services.exam_deadlines). Deadlines are checked every
+# DEADLINE_CHECK_INTERVAL_SECONDS (0 disables it) and closed in batches of
+# DEADLINE_BATCH_SIZE; the schedule is reloaded from the open sessions every
+# DEADLINE_RESYNC_SECONDS.
+DEADLINE_CHECK_INTERVAL_SECONDS = float(os.getenv("DEADLINE_CHECK_INTERVAL_SECONDS", "5"))
+DEADLINE_GRACE_SECONDS = float(os.getenv("DEADLINE_GRACE_SECONDS", "30"))
+DEADLINE_BATCH_SIZE = int(os.getenv("DEADLINE_BATCH_SIZE", "200"))
+DEADLINE_RESYNC_SECONDS = float(os.getenv("DEADLINE_RESYNC_SECONDS", "300"))
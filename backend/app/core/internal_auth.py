@@ -0,0 +1,113 @@
+import hashlib
+import hmac
+import time
+from collections.abc import Iterable, Mapping
+from urllib.parse import urlencode
+
+from app.core.config import INTERNAL_AUTH_MAX_AGE_SECONDS, INTERNAL_AUTH_SECRET
+from app.core.principal import Principal
+from app.core.roles import UserRole, normalize_role
+
+
+INTERNAL_HEADER_PREFIX = "x-internal-"
+
+USER_ID_HEADER = "x-internal-user-id"
+ROLE_HEADER = "x-internal-user-role"
+CLASS_IDS_HEADER = "x-internal-class-ids"
+ISSUED_AT_HEADER = "x-internal-issued-at"
+SIGNATURE_HEADER = "x-internal-signature"
+
+VALID_ROLES = {role.value for role in UserRole}
+
+
+def canonical_query(params: Iterable[tuple[str, str]]) -> str:
+    """Query string in the form that is signed.
+
+    The gateway re-encodes parameters when proxying, so both sides sign the
+    sorted, re-encoded pairs rather than the raw string they received.
+    """
+    return urlencode(sorted(params))
+
+
+def _signature(
+    method: str, path: str, query: str, user_id: str, role: str, class_ids: str, issued_at: str
+) -> str:
+    message = "\n".join(
+        ["identity", method.upper(), path, query, user_id, role, class_ids, issued_at]
+    )
+    return hmac.new(
+        INTERNAL_AUTH_SECRET.encode("utf-8"),
+        message.encode("utf-8"),
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def sign_identity(method: str, path: str, query: str, principal: Principal) -> dict[str, str]:
+    """Headers the gateway attaches after verifying the caller's JWT.
+
+    The signature covers method, path and ``query`` (see ``canonical_query``)
+    so a captured header set cannot be replayed against another endpoint or
+    with other parameters, and expires after INTERNAL_AUTH_MAX_AGE_SECONDS.
+    """
+    user_id = str(principal.id)
+    class_ids = (
+        ",".join(str(class_id) for class_id in principal.class_ids)
+        if principal.class_ids is not None
+        else "-"
+    )
+    issued_at = str(int(time.time()))
+    return {
+        USER_ID_HEADER: user_id,
+        ROLE_HEADER: principal.role,
+        CLASS_IDS_HEADER: class_ids,
+        ISSUED_AT_HEADER: issued_at,
+        SIGNATURE_HEADER: _signature(method, path, query, user_id, principal.role, class_ids, issued_at),
+    }
+
+
+def verify_identity(method: str, path: str, query: str, headers: Mapping[str, str]) -> Principal | None:
+    """Return the gateway-asserted principal, or None if absent or not trusted."""
+    signature = headers.get(SIGNATURE_HEADER)
+    if not signature:
+        return None
+
+    user_id = headers.get(USER_ID_HEADER, "")
+    role = normalize_role(headers.get(ROLE_HEADER))
+    class_ids = headers.get(CLASS_IDS_HEADER, "")
+    issued_at = headers.get(ISSUED_AT_HEADER, "")
+
+    expected = _signature(method, path, query, user_id, role, class_ids, issued_at)
+    if not hmac.compare_digest(signature, expected):
+        return None
+
+    try:
+        age = time.time() - int(issued_at)
+        user_id_int = int(user_id)
+        class_id_list = (
+            None if class_ids == "-"
+            else [int(item) for item in class_ids.split(",") if item]
+        )
+    except ValueError:
+        return None
+
+    if age > INTERNAL_AUTH_MAX_AGE_SECONDS or age < -INTERNAL_AUTH_MAX_AGE_SECONDS:
+        return None
+    if role not in VALID_ROLES:
+        return None
+
+    return Principal(user_id_int, role, class_id_list)
+
+
+def sign_payload(body: bytes) -> str:
+    """Signature for service-to-service calls such as cache events."""
+    return hmac.new(
+        INTERNAL_AUTH_SECRET.encode("utf-8"),
+        b"payload\n" + body,
+        hashlib.sha256,
+    ).hexdigest()
+
+
+def verify_payload(body: bytes, signature: str | None) -> bool:
+    if not signature:
+        return False
+    return hmac.compare_digest(signature, sign_payload(body))
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from jose import jwt
+from jose import JWTError, jwt
 from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -12,3 +12,16 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
 
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+
+def read_token_identity(token: str) -> tuple[int, str] | None:
+    """Return (user_id, role) from a valid access token, or None."""
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        user_id = payload.get("user_id")
+        role = payload.get("role")
+        if user_id is None or not role:
+            return None
+        return int(user_id), str(role).strip().lower()
+    except (JWTError, ValueError):
+        return None
@@ -0,0 +1,323 @@
+import bisect
+import threading
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[Any]) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, Any]) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: Any):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> (per-bucket counts, +Inf count is the total, sum)
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(self._key(labels))
+        return series[1] if series else 0
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(
+                (key, (list(series[0]), series[1], series[2]))
+                for key, series in self._series.items()
+            )
+
+        lines = self.header()
+        for key, (bucket_counts, total, value_sum) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                labels = _format_labels((*self.labelnames, "le"), (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels((*self.labelnames, "le"), (*key, "+Inf"))
+            lines.append(f"{self.name}_bucket{labels} {total}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(value_sum)}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class Registry:
+    """Holds every metric of the process and renders the Prometheus text format.
+
+    Collectors are callables returning extra lines at scrape time, for values
+    that are cheaper to read on demand (pool sizes, cache sizes) than to track.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[[], list[str]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric_class, name: str, *args, **kwargs):
+        with self._lock:
+            existing = self._metrics.get(name)
+            if existing is not None:
+                if not isinstance(existing, metric_class):
+                    raise ValueError(f"Metric '{name}' is already registered as {existing.kind}")
+                return existing
+            metric = metric_class(name, *args, **kwargs)
+            self._metrics[name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram, name, documentation, labelnames, buckets)
+
+    def add_collector(self, collector: Callable[[], list[str]]):
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines: list[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def metrics_response() -> Response:
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def gauge_lines(name: str, documentation: str, samples: dict[tuple[tuple[str, Any], ...], float]) -> list[str]:
+    """Render a collector-computed gauge; ``samples`` maps label pairs to values."""
+    return sample_lines(name, documentation, "gauge", samples)
+
+
+def counter_lines(name: str, documentation: str, samples: dict[tuple[tuple[str, Any], ...], float]) -> list[str]:
+    return sample_lines(name, documentation, "counter", samples)
+
+
+def sample_lines(
+    name: str,
+    documentation: str,
+    kind: str,
+    samples: dict[tuple[tuple[str, Any], ...], float],
+) -> list[str]:
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples.items():
+        names = [label for label, _ in labels]
+        values = [value_ for _, value_ in labels]
+        lines.append(f"{name}{_format_labels(names, values)} {_format_value(value)}")
+    return lines
+
+
+_caches: dict[str, Any] = {}
+
+
+def register_cache(name: str, cache: Any):
+    """Expose a TTLCache's hit/miss/eviction counters and size as ``cache_*`` series."""
+    _caches[name] = cache
+    REGISTRY.add_collector(_cache_metrics)
+
+
+def _cache_metrics() -> list[str]:
+    stats = {(("cache", name),): cache.stats() for name, cache in _caches.items()}
+    return (
+        counter_lines("cache_hits_total", "Cache lookups that found a live entry.",
+                      {labels: s["hits"] for labels, s in stats.items()})
+        + counter_lines("cache_misses_total", "Cache lookups that missed or found an expired entry.",
+                        {labels: s["misses"] for labels, s in stats.items()})
+        + counter_lines("cache_evictions_total", "Entries evicted to respect the size bound.",
+                        {labels: s["evictions"] for labels, s in stats.items()})
+        + gauge_lines("cache_entries", "Entries currently held.",
+                      {labels: s["size"] for labels, s in stats.items()})
+    )
+
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total",
+    "HTTP requests handled, by app, method, route template and status code.",
+    ("app", "method", "route", "status"),
+)
+HTTP_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last response byte.",
+    ("app", "method", "route"),
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight",
+    "Requests currently being handled.",
+    ("app",),
+)
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path:
+        return path
+    # Unmatched paths are collapsed so random URLs cannot blow up cardinality.
+    return "<unmatched>"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request count, latency and in-flight requests.
+
+    Requests are labelled with the matched route template (``/exams/{exam_id}``),
+    or with whatever ``route_label`` returns when one is given.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        app_name: str,
+        route_label: Callable[[Scope], str] | None = None,
+        exclude_paths: Iterable[str] = ("/metrics",),
+    ):
+        self.app = app
+        self.app_name = app_name
+        self.route_label = route_label or _route_label
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(app=self.app_name)
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec(app=self.app_name)
+            route = self.route_label(scope)
+            HTTP_REQUESTS.inc(
+                app=self.app_name, method=scope["method"], route=route, status=status_code
+            )
+            HTTP_LATENCY.observe(elapsed, app=self.app_name, method=scope["method"], route=route)
@@ -0,0 +1,171 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+
+import bcrypt
+
+from app.core.config import PASSWORD_HASH_MAX_QUEUE, PASSWORD_HASH_WORKERS
+from app.core.metrics import REGISTRY
+
+
+PASSWORD_HASH_SECONDS = REGISTRY.histogram(
+    "password_hash_seconds",
+    "Time from submitting a bcrypt job to getting its result, queueing included.",
+    ("op",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0, 10.0),
+)
+PASSWORD_HASH_QUEUE_DEPTH = REGISTRY.gauge(
+    "password_hash_queue_depth",
+    "bcrypt jobs submitted and not yet finished.",
+)
+PASSWORD_HASH_REJECTED = REGISTRY.counter(
+    "password_hash_rejected_total",
+    "bcrypt jobs refused because the queue was full.",
+    ("op",),
+)
+
+
+class PasswordHasherBusy(Exception):
+    """The bcrypt queue is full; the caller should answer 503 and retry later."""
+
+
+def _hash_password(password: str) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+def _verify_password(plain_password: str, hashed_password: str) -> bool:
+    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated process pool so it never occupies the
+    request threadpool or the event loop.
+
+    At most ``max_queue`` jobs may be pending (running or waiting); further
+    submissions fail fast with ``PasswordHasherBusy``. With ``workers=0``
+    jobs run on a small thread pool instead, which is simpler to debug but
+    shares the GIL with the app.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.pending = 0
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.workers > 0:
+                        # spawn: forking a multi-threaded server is unsafe.
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=2, thread_name_prefix="password-hash"
+                        )
+        return self._executor
+
+    def start(self):
+        """Spawn the worker processes now instead of on the first login.
+
+        Services that check or hash passwords call this (and ``stop``) from
+        their lifespan.
+        """
+        executor = self._get_executor()
+        for future in [executor.submit(_hash_password, "") for _ in range(max(self.workers, 1))]:
+            future.result()
+
+    def stop(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _submit(self, op: str, fn, *args) -> Future:
+        with self._lock:
+            if self.pending >= self.max_queue:
+                PASSWORD_HASH_REJECTED.inc(op=op)
+                raise PasswordHasherBusy(op)
+            self.pending += 1
+        PASSWORD_HASH_QUEUE_DEPTH.inc()
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._done(op, started)
+            raise
+        future.add_done_callback(lambda _: self._done(op, started))
+        return future
+
+    def _done(self, op: str, started: float):
+        with self._lock:
+            self.pending -= 1
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+        PASSWORD_HASH_SECONDS.observe(time.perf_counter() - started, op=op)
+
+    async def hash(self, password: str) -> str:
+        return await asyncio.wrap_future(self._submit("hash", _hash_password, password))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await asyncio.wrap_future(
+            self._submit("verify", _verify_password, plain_password, hashed_password)
+        )
+
+    def hash_sync(self, password: str) -> str:
+        """Blocking variant for code already running in a worker thread."""
+        return self._submit("hash", _hash_password, password).result()
+
+    def verify_sync(self, plain_password: str, hashed_password: str) -> bool:
+        return self._submit("verify", _verify_password, plain_password, hashed_password).result()
+
+    def hash_many_sync(self, passwords: list[str]) -> list[str]:
+        """Hash a batch on all workers while leaving queue room for logins.
+
+        At most two jobs per worker are outstanding at a time, so a login
+        submitted meanwhile waits behind a short window rather than the whole
+        batch; when the queue is full the batch backs off instead of failing.
+        """
+        window = max(self.workers, 1) * 2
+        results: list[str | None] = [None] * len(passwords)
+        outstanding: dict[int, Future] = {}
+        next_index = 0
+
+        while next_index < len(passwords) or outstanding:
+            while next_index < len(passwords) and len(outstanding) < window:
+                try:
+                    outstanding[next_index] = self._submit("hash", _hash_password, passwords[next_index])
+                except PasswordHasherBusy:
+                    break
+                next_index += 1
+            if not outstanding:
+                time.sleep(0.05)
+                continue
+            wait(outstanding.values(), return_when=FIRST_COMPLETED)
+            for index in [index for index, future in outstanding.items() if future.done()]:
+                results[index] = outstanding.pop(index).result()
+        return results
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+        }
+
+
+password_hasher = PasswordHasher(workers=PASSWORD_HASH_WORKERS, max_queue=PASSWORD_HASH_MAX_QUEUE)
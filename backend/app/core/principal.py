@@ -0,0 +1,21 @@
+from app.core.roles import normalize_role
+
+
+class Principal:
+    """Authenticated caller, detached from any DB session.
+
+    Routers only read ``id``, ``role`` and, for students, ``class_ids`` /
+    ``class_id``; ``class_ids`` stays ``None`` until membership is known.
+    """
+
+    def __init__(self, id: int, role: str, class_ids: list[int] | None = None):
+        self.id = int(id)
+        self.role = normalize_role(role)
+        self.class_ids = list(class_ids) if class_ids is not None else None
+        self.class_id = self.class_ids[0] if self.class_ids else None
+
+    def copy(self) -> "Principal":
+        return Principal(self.id, self.role, self.class_ids)
+
+    def __repr__(self) -> str:
+        return f"Principal(id={self.id}, role={self.role!r}, class_ids={self.class_ids!r})"
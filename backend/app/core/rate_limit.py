@@ -0,0 +1,152 @@
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional: only needed for a shared limiter
+    redis_asyncio = None
+
+
+_PERIODS = {"s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``burst``."""
+
+    rate: float
+    burst: float
+
+    @classmethod
+    def parse(cls, value: str) -> "RateLimit":
+        """Parse ``"<count>/<s|m|h>[:<burst>]"``, e.g. ``"2/s:10"`` or ``"30/m"``.
+
+        The burst defaults to the per-period count.
+        """
+        spec, _, burst = value.strip().partition(":")
+        count, _, period = spec.partition("/")
+        try:
+            count_value = float(count)
+            seconds = _PERIODS[(period.strip() or "s").lower()]
+            burst_value = float(burst) if burst.strip() else count_value
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit '{value}', expected e.g. '2/s:10'")
+        if count_value <= 0 or burst_value < 1:
+            raise ValueError(f"Invalid rate limit '{value}'")
+        return cls(rate=count_value / seconds, burst=burst_value)
+
+    def __str__(self) -> str:
+        return f"{self.rate:g}/s:{self.burst:g}"
+
+
+class MemoryRateLimiter:
+    """Per-process token buckets, bounded to ``max_keys`` most recently used keys."""
+
+    backend = "memory"
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        """Take one token; return 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [limit.burst, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+
+        tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * limit.rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / limit.rate
+
+    async def close(self):
+        self._buckets.clear()
+
+
+# Same algorithm as MemoryRateLimiter, run atomically in Redis using the
+# server clock so several gateway processes share one bucket per key.
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimiter:
+    """Token buckets shared through Redis (requires the ``redis`` package).
+
+    If Redis cannot be reached the request is checked against a local
+    in-memory bucket instead, so limits degrade to per-process rather than off.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, key_prefix: str = "ratelimit:", max_keys: int = 100_000):
+        if redis_asyncio is None:
+            raise RuntimeError("GATEWAY_RATE_LIMIT_REDIS_URL is set but the 'redis' package is not installed")
+        self.key_prefix = key_prefix
+        self._client = redis_asyncio.from_url(url)
+        self._script = self._client.register_script(_REDIS_TOKEN_BUCKET)
+        self._fallback = MemoryRateLimiter(max_keys)
+        self.backend_errors = 0
+
+    async def acquire(self, key: str, limit: RateLimit) -> float:
+        try:
+            retry_after = await self._script(
+                keys=[self.key_prefix + key],
+                args=[limit.rate, limit.burst],
+            )
+        except Exception:
+            self.backend_errors += 1
+            return await self._fallback.acquire(key, limit)
+        return float(retry_after)
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_rate_limiter(redis_url: str = "", max_keys: int = 100_000):
+    if redis_url:
+        return RedisRateLimiter(redis_url, max_keys=max_keys)
+    return MemoryRateLimiter(max_keys)
+
+
+class RejectionStats:
+    """Counts requests turned away, by reason and route class or service."""
+
+    def __init__(self):
+        self.rejected: Counter[tuple[str, str]] = Counter()
+
+    def record(self, reason: str, label: str):
+        self.rejected[(reason, label)] += 1
+
+    def stats(self) -> dict[str, Any]:
+        result: dict[str, dict[str, int]] = {}
+        for (reason, label), count in sorted(self.rejected.items()):
+            result.setdefault(reason, {})[label] = count
+        return result
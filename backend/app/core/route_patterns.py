@@ -0,0 +1,56 @@
+class RoutePattern:
+    """Method + path pattern where ``*`` matches exactly one path segment.
+
+    Examples: ``GET /exams/*``, ``/exams/*/questions`` (any method).
+    A trailing slash is ignored on both sides.
+    """
+
+    def __init__(self, pattern: str):
+        method, _, path = pattern.strip().rpartition(" ")
+        self.method = method.strip().upper() or "*"
+        self.path = path.strip()
+        self.segments = self._segments(self.path)
+
+    @staticmethod
+    def _segments(path: str) -> list[str]:
+        return [segment for segment in path.strip("/").split("/") if segment]
+
+    def matches(self, method: str, path: str) -> bool:
+        if self.method != "*" and self.method != method.upper():
+            return False
+        segments = self._segments(path)
+        if len(segments) != len(self.segments):
+            return False
+        return all(
+            expected == "*" or expected == actual
+            for expected, actual in zip(self.segments, segments)
+        )
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+def parse_route_rules(value: str, default: str = "") -> list[tuple[RoutePattern, str]]:
+    """Parse ``"GET /exams/*=30, /classes"`` into (pattern, option) pairs.
+
+    Rules are separated by commas; the text after ``=`` is returned as-is
+    (``default`` when omitted) for the caller to interpret.
+    """
+    rules = []
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        pattern, _, option = item.partition("=")
+        rules.append((RoutePattern(pattern), option.strip() or default))
+    return rules
+
+
+def match_route_rule(
+    rules: list[tuple[RoutePattern, str]],
+    method: str,
+    path: str,
+) -> tuple[RoutePattern, str] | None:
+    for pattern, option in rules:
+        if pattern.matches(method, path):
+            return pattern, option
+    return None
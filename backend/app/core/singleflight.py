@@ -0,0 +1,42 @@
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls into one shared execution.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is running await the same result. The task is shielded,
+    so a disconnecting caller does not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.executions: Counter[str] = Counter()
+        self.collapsed: Counter[str] = Counter()
+
+    async def do(self, key: Hashable, label: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.executions[label] += 1
+        else:
+            self.collapsed[label] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict[str, Any]:
+        labels = sorted(set(self.executions) | set(self.collapsed))
+        return {
+            "in_flight": len(self._inflight),
+            "routes": {
+                label: {
+                    "upstream_requests": self.executions[label],
+                    "collapsed_requests": self.collapsed[label],
+                }
+                for label in labels
+            },
+        }
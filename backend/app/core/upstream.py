@@ -0,0 +1,490 @@
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from app.core.metrics import REGISTRY
+
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+BALANCE_STRATEGIES = {"least_outstanding", "latency"}
+
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "gateway_upstream_duration_seconds",
+    "Time until an upstream replica returned response headers, per attempt.",
+    ("service", "status"),
+)
+UPSTREAM_POOL_WAIT = REGISTRY.histogram(
+    "gateway_upstream_pool_wait_seconds",
+    "Time spent waiting for a free upstream connection slot.",
+    ("service",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0),
+)
+
+# Upstream time accumulated by the current request; the gateway sets a fresh
+# accumulator per request to derive its own overhead.
+upstream_time: ContextVar[list[float] | None] = ContextVar("upstream_time", default=None)
+
+
+class UpstreamPoolTimeout(Exception):
+    pass
+
+
+class UpstreamUnavailable(Exception):
+    pass
+
+
+class UpstreamOverloaded(Exception):
+    """The service already has ``max_in_flight`` requests outstanding."""
+
+
+@dataclass
+class UpstreamLimits:
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    pool_timeout: float = 10.0
+    # Requests beyond this many outstanding per service are shed (0 = no cap).
+    max_in_flight: int = 0
+
+
+@dataclass
+class BalancerSettings:
+    strategy: str = "least_outstanding"
+    retry_attempts: int = 2
+    failure_threshold: int = 5
+    reset_timeout: float = 10.0
+    health_check_interval: float = 5.0
+    health_check_timeout: float = 2.0
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures.
+
+    While open the replica receives no traffic; after ``reset_timeout`` a
+    single trial request is let through (half-open) and its outcome closes
+    or re-opens the breaker. A trial that ends without an outcome must call
+    ``fail_trial`` or ``cancel_trial``, or the replica is never picked again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.times_opened = 0
+
+    def allows_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        return self.state == self.HALF_OPEN and not self.trial_in_flight
+
+    def on_dispatch(self):
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.trial_in_flight = False
+
+    def fail_trial(self):
+        """The trial got no response for a reason that does not count as a
+        failure while closed (e.g. no free connection slot)."""
+        if self.state == self.HALF_OPEN:
+            self.record_failure()
+
+    def cancel_trial(self):
+        """The trial was abandoned (e.g. the client went away); allow another."""
+        if self.state == self.HALF_OPEN:
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class UpstreamClient:
+    """Long-lived, keep-alive HTTP client for a single upstream replica.
+
+    Requests are admitted through a semaphore sized like the connection pool,
+    so the time spent waiting on it is the time spent waiting for a pooled
+    connection. When ``transport`` is an ``httpx.ASGITransport`` the replica
+    is a service app mounted in the gateway process and no socket is used.
+    """
+
+    LATENCY_EWMA_ALPHA = 0.2
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        limits: UpstreamLimits,
+        breaker: CircuitBreaker | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.limits = limits
+        self.transport = transport
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=10.0)
+        self.healthy = True
+        self.latency_ewma = 0.0
+        self._client: httpx.AsyncClient | None = None
+        self._slots = asyncio.Semaphore(limits.max_connections)
+        self._streaming: set[int] = set()
+
+        self.active_requests = 0
+        self.requests_total = 0
+        self.pool_timeouts = 0
+        self.pool_wait_seconds_total = 0.0
+        self.pool_wait_seconds_max = 0.0
+
+    async def start(self):
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            follow_redirects=True,
+            timeout=httpx.Timeout(
+                self.limits.read_timeout,
+                connect=self.limits.connect_timeout,
+                pool=self.limits.pool_timeout,
+            ),
+            limits=httpx.Limits(
+                max_connections=self.limits.max_connections,
+                max_keepalive_connections=self.limits.max_keepalive_connections,
+                keepalive_expiry=self.limits.keepalive_expiry,
+            ),
+            transport=self.transport,
+        )
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _acquire(self):
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.limits.pool_timeout)
+        except asyncio.TimeoutError:
+            self.pool_timeouts += 1
+            raise UpstreamPoolTimeout(self.name)
+
+        waited = time.perf_counter() - started
+        UPSTREAM_POOL_WAIT.observe(waited, service=self.name)
+        self.pool_wait_seconds_total += waited
+        self.pool_wait_seconds_max = max(self.pool_wait_seconds_max, waited)
+        self.active_requests += 1
+        self.requests_total += 1
+
+    def _release(self):
+        self.active_requests -= 1
+        self._slots.release()
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        if self._client is None:
+            raise RuntimeError(f"Upstream client '{self.name}' is not started")
+
+        await self._acquire()
+        try:
+            return await self._client.request(method, path, **kwargs)
+        finally:
+            self._release()
+
+    async def stream(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Send a request and return as soon as the response headers arrive.
+
+        The body is left unread; the caller must hand the response back to
+        ``release`` once it has been relayed so the connection slot is freed.
+        """
+        if self._client is None:
+            raise RuntimeError(f"Upstream client '{self.name}' is not started")
+
+        await self._acquire()
+        try:
+            upstream_request = self._client.build_request(method, path, **kwargs)
+            response = await self._client.send(upstream_request, stream=True)
+        except BaseException:
+            self._release()
+            raise
+
+        self._streaming.add(id(response))
+        return response
+
+    async def release(self, response: httpx.Response):
+        if id(response) not in self._streaming:
+            return
+        self._streaming.discard(id(response))
+        try:
+            await response.aclose()
+        finally:
+            self._release()
+
+    def observe(self, latency: float, ok: bool):
+        if self.latency_ewma:
+            self.latency_ewma += self.LATENCY_EWMA_ALPHA * (latency - self.latency_ewma)
+        else:
+            self.latency_ewma = latency
+        if ok:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+
+    async def check_health(self, timeout: float) -> bool:
+        # Bypasses the request slots so a saturated pool does not look unhealthy.
+        try:
+            response = await self._client.get("/health", timeout=timeout)
+            self.healthy = response.status_code == 200
+        except httpx.HTTPError:
+            self.healthy = False
+        return self.healthy
+
+    def _idle_and_open_connections(self) -> tuple[int, int]:
+        transport = getattr(self._client, "_transport", None)
+        pool = getattr(transport, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return idle, len(connections)
+
+    def stats(self) -> dict[str, Any]:
+        idle, open_connections = self._idle_and_open_connections()
+        return {
+            "service": self.name,
+            "base_url": self.base_url,
+            "dispatch": "in_process" if self.transport is not None else "http",
+            "healthy": self.healthy,
+            "circuit": self.breaker.state,
+            "circuit_times_opened": self.breaker.times_opened,
+            "latency_ewma_seconds": round(self.latency_ewma, 6),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "active_requests": self.active_requests,
+            "open_connections": open_connections,
+            "idle_connections": idle,
+            "requests_total": self.requests_total,
+            "pool_timeouts": self.pool_timeouts,
+            "pool_wait_seconds_total": round(self.pool_wait_seconds_total, 6),
+            "pool_wait_seconds_avg": round(
+                self.pool_wait_seconds_total / self.requests_total, 6
+            ) if self.requests_total else 0.0,
+            "pool_wait_seconds_max": round(self.pool_wait_seconds_max, 6),
+        }
+
+
+class UpstreamGroup:
+    """All replicas of one service behind the gateway.
+
+    Each request goes to the healthy replica with the fewest outstanding
+    requests (or the lowest expected latency), skipping replicas whose
+    circuit is open. Only idempotent methods are retried, on another replica,
+    after a transport error or a 502/503/504.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_urls: list[str],
+        limits: UpstreamLimits,
+        settings: BalancerSettings,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        if settings.strategy not in BALANCE_STRATEGIES:
+            raise ValueError(f"Unknown balance strategy '{settings.strategy}'")
+        self.name = name
+        self.limits = limits
+        self.settings = settings
+        self.replicas = [
+            UpstreamClient(
+                name,
+                base_url,
+                limits,
+                CircuitBreaker(settings.failure_threshold, settings.reset_timeout),
+                transport,
+            )
+            for base_url in base_urls
+        ]
+        self.retries_total = 0
+        self.unavailable_total = 0
+        self.in_flight = 0
+        self.shed_total = 0
+        self._owners: dict[int, UpstreamClient] = {}
+        self._health_task: asyncio.Task | None = None
+
+    async def start(self):
+        for replica in self.replicas:
+            await replica.start()
+        if self.settings.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for replica in self.replicas:
+            await replica.close()
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.settings.health_check_interval)
+            await asyncio.gather(
+                *(
+                    replica.check_health(self.settings.health_check_timeout)
+                    for replica in self.replicas
+                )
+            )
+
+    def _score(self, replica: UpstreamClient) -> float:
+        if self.settings.strategy == "latency":
+            return (replica.latency_ewma or 0.001) * (replica.active_requests + 1)
+        return replica.active_requests
+
+    def pick(self, exclude: set[int] | None = None) -> UpstreamClient:
+        exclude = exclude or set()
+        candidates = [
+            replica for index, replica in enumerate(self.replicas)
+            if index not in exclude and replica.breaker.allows_request()
+        ]
+        healthy = [replica for replica in candidates if replica.healthy]
+        # If every replica fails its health check, still try the ones whose
+        # circuit allows it rather than rejecting all traffic.
+        candidates = healthy or candidates
+        if not candidates:
+            self.unavailable_total += 1
+            raise UpstreamUnavailable(self.name)
+
+        best = min(self._score(replica) for replica in candidates)
+        replica = random.choice(
+            [replica for replica in candidates if self._score(replica) == best]
+        )
+        replica.breaker.on_dispatch()
+        return replica
+
+    def _attempts(self, method: str) -> int:
+        if method.upper() in IDEMPOTENT_METHODS:
+            return 1 + max(self.settings.retry_attempts, 0)
+        return 1
+
+    async def request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        return await self._dispatch(method, path, stream=False, **kwargs)
+
+    async def stream(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        return await self._dispatch(method, path, stream=True, **kwargs)
+
+    async def _dispatch(self, method: str, path: str, stream: bool, **kwargs: Any) -> httpx.Response:
+        # Shed instead of queueing once the service is saturated; a streamed
+        # response counts as in flight until it is released.
+        if self.limits.max_in_flight and self.in_flight >= self.limits.max_in_flight:
+            self.shed_total += 1
+            raise UpstreamOverloaded(self.name)
+
+        self.in_flight += 1
+        try:
+            response = await self._send_with_retries(method, path, stream, **kwargs)
+        except BaseException:
+            self.in_flight -= 1
+            raise
+        if not stream:
+            self.in_flight -= 1
+        return response
+
+    async def _send_with_retries(self, method: str, path: str, stream: bool, **kwargs: Any) -> httpx.Response:
+        attempts = self._attempts(method)
+        tried: set[int] = set()
+        last_error: Exception | None = None
+
+        for attempt in range(attempts):
+            if attempt:
+                self.retries_total += 1
+            try:
+                replica = self.pick(tried)
+            except UpstreamUnavailable:
+                if last_error is not None:
+                    raise last_error
+                raise
+            tried.add(self.replicas.index(replica))
+
+            started = time.perf_counter()
+            try:
+                if stream:
+                    response = await replica.stream(method, path, **kwargs)
+                else:
+                    response = await replica.request(method, path, **kwargs)
+            except httpx.TransportError as exc:
+                elapsed = self._record_attempt(started, "error")
+                replica.observe(elapsed, ok=False)
+                last_error = exc
+                if attempt + 1 < attempts:
+                    continue
+                raise
+            except UpstreamPoolTimeout:
+                replica.breaker.fail_trial()
+                raise
+            except BaseException:
+                # Cancelled or failed before any outcome; free a half-open trial.
+                replica.breaker.cancel_trial()
+                raise
+
+            failed = response.status_code in RETRYABLE_STATUS_CODES
+            replica.observe(self._record_attempt(started, response.status_code), ok=not failed)
+            if failed and attempt + 1 < attempts and len(tried) < len(self.replicas):
+                if stream:
+                    await replica.release(response)
+                continue
+
+            if stream:
+                self._owners[id(response)] = replica
+            return response
+
+        raise last_error or UpstreamUnavailable(self.name)
+
+    def _record_attempt(self, started: float, status) -> float:
+        elapsed = time.perf_counter() - started
+        UPSTREAM_LATENCY.observe(elapsed, service=self.name, status=status)
+        accumulator = upstream_time.get()
+        if accumulator is not None:
+            accumulator[0] += elapsed
+        return elapsed
+
+    async def release(self, response: httpx.Response):
+        replica = self._owners.pop(id(response), None)
+        if replica is not None:
+            self.in_flight -= 1
+            await replica.release(response)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "strategy": self.settings.strategy,
+            "retries_total": self.retries_total,
+            "unavailable_total": self.unavailable_total,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.limits.max_in_flight,
+            "shed_total": self.shed_total,
+            "replicas": [replica.stats() for replica in self.replicas],
+        }
@@ -1,9 +1,15 @@
+import time
+
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base # Import thêm declarative_base
 from typing import Generator
 import os
 from dotenv import load_dotenv
 
+from app.core.metrics import REGISTRY, gauge_lines
+
 # Load biến môi trường từ .env
 load_dotenv()
 
@@ -16,8 +22,52 @@ DB_NAME = os.getenv('DB_NAME', 'exam_system')
 
 DATABASE_URL = f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
+DB_POOL_CHECKOUT_SECONDS = REGISTRY.histogram(
+    "db_pool_checkout_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_TIMEOUTS = REGISTRY.counter(
+    "db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after pool_timeout.",
+)
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
 # Tạo engine
-engine = create_engine(DATABASE_URL, echo=False, pool_pre_ping=True)
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    poolclass=InstrumentedQueuePool,
+)
+
+
+def _pool_metrics() -> list[str]:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return []
+    return (
+        gauge_lines("db_pool_size", "Configured pool size.", {(): pool.size()})
+        + gauge_lines("db_pool_checked_out", "Connections currently checked out.", {(): pool.checkedout()})
+        + gauge_lines("db_pool_overflow", "Connections open beyond pool_size.", {(): max(pool.overflow(), 0)})
+    )
+
+
+REGISTRY.add_collector(_pool_metrics)
 
 # Tạo session factory
 SessionLocal = sessionmaker(
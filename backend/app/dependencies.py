@@ -1,24 +1,83 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 
-from app.core.config import ALGORITHM, SECRET_KEY
+from app.core import cache_events
+from app.core.config import (
+    ALGORITHM,
+    PRINCIPAL_CACHE_SIZE,
+    PRINCIPAL_CACHE_TTL_SECONDS,
+    SECRET_KEY,
+)
+from app.core.internal_auth import canonical_query, verify_identity
+from app.core.metrics import register_cache
+from app.core.principal import Principal
 from app.core.roles import UserRole, normalize_role
+from app.core.ttl_cache import TTLCache
 from app.database import get_db
 from app.models.admin import Admin
-from app.models.class_student import ClassStudent
 from app.models.student import Student
 from app.models.teacher import Teacher
+from app.services.class_membership import class_membership
 
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
+ROLE_MODELS = {
+    UserRole.admin.value: Admin,
+    UserRole.teacher.value: Teacher,
+    UserRole.student.value: Student,
+}
+
+# (role, user_id) -> Principal, or False for an account that does not exist.
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS)
+register_cache("principal", principal_cache)
+
+
+def _invalidate_principal(key: str | None):
+    if key is None:
+        principal_cache.clear()
+        return
+    role, _, user_id = key.partition(":")
+    principal_cache.pop((role, int(user_id)))
+
+
+cache_events.subscribe(cache_events.ACCOUNT, _invalidate_principal)
+
+
+def load_principal(db: Session, role: str, user_id: int) -> Principal | None:
+    """Resolve a token's (role, user_id) into a Principal with one query.
+
+    Students come back with their class ids (from the membership index) so
+    no further membership lookup is needed. Returns None when the account no
+    longer exists.
+    """
+    model = ROLE_MODELS.get(role)
+    if model is None:
+        return None
+    if db.query(model.id).filter(model.id == user_id).first() is None:
+        return None
+    if role == UserRole.student.value:
+        return Principal(user_id, role, class_membership.class_ids_for_student(db, user_id))
+    return Principal(user_id, role)
+
 
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
     db: Session = Depends(get_db),
 ):
+    # Fast path: the gateway already verified the token and signed the identity.
+    principal = verify_identity(
+        request.method,
+        request.url.path,
+        canonical_query(request.query_params.multi_items()),
+        request.headers,
+    )
+    if principal is not None:
+        return principal
+
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -44,27 +103,27 @@ def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if role == UserRole.admin.value:
-        user = db.query(Admin).filter(Admin.id == user_id_int).first()
-    elif role == UserRole.teacher.value:
-        user = db.query(Teacher).filter(Teacher.id == user_id_int).first()
-    elif role == UserRole.student.value:
-        user = db.query(Student).filter(Student.id == user_id_int).first()
-    else:
+    if role not in ROLE_MODELS:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid token role",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not user:
+    cached = principal_cache.get((role, user_id_int))
+    if cached is None:
+        cached = load_principal(db, role, user_id_int) or False
+        principal_cache.set((role, user_id_int), cached)
+
+    if not cached:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token user does not exist",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    # Handlers may annotate the principal; keep the cached one pristine.
+    return cached.copy()
 
 
 def get_current_teacher(current_user=Depends(get_current_user)):
@@ -98,14 +157,9 @@ def get_current_student(
             detail="Student permission required",
         )
 
-    class_ids = [
-        row[0]
-        for row in (
-            db.query(ClassStudent.class_id)
-            .filter(ClassStudent.student_id == current_user.id)
-            .all()
-        )
-    ]
+    class_ids = getattr(current_user, "class_ids", None)
+    if class_ids is None:
+        class_ids = class_membership.class_ids_for_student(db, current_user.id)
 
     if not class_ids:
         raise HTTPException(
@@ -1,21 +1,78 @@
+import hashlib
+import importlib
+import math
 import os
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import Any
 
 import httpx
 from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
 
+from app.core import cache_events
 from app.core.config import CORS_ORIGINS
+from app.core.internal_auth import INTERNAL_HEADER_PREFIX, canonical_query, sign_identity
+from app.core.metrics import REGISTRY, MetricsMiddleware, gauge_lines, metrics_response, register_cache
+from app.core.jwt import read_token_identity
+from app.core.principal import Principal
+from app.core.rate_limit import RateLimit, RejectionStats, create_rate_limiter
+from app.core.response_cache import CachedResponse, ResponseCache, etag_matches, make_etag
+from app.core.route_patterns import RoutePattern, match_route_rule, parse_route_rules
+from app.core.singleflight import SingleFlight
+from app.core.ttl_cache import TTLCache
+from app.core.upstream import (
+    BalancerSettings,
+    UpstreamGroup,
+    UpstreamLimits,
+    UpstreamOverloaded,
+    UpstreamPoolTimeout,
+    UpstreamUnavailable,
+    upstream_time,
+)
+from app.database import SessionLocal
+from app.dependencies import load_principal
+from app.routers.internal import router as internal_router
+
+
+def _service_urls(env_name: str, default: str) -> list[str]:
+    # Comma-separated list of replicas, e.g. "http://127.0.0.1:8105,http://127.0.0.1:8115".
+    return [url.strip() for url in os.getenv(env_name, default).split(",") if url.strip()]
 
 
 SERVICE_URLS = {
-    "auth": os.getenv("AUTH_SERVICE_URL", "http://127.0.0.1:8101"),
-    "user": os.getenv("USER_SERVICE_URL", "http://127.0.0.1:8102"),
-    "class": os.getenv("CLASS_SERVICE_URL", "http://127.0.0.1:8103"),
-    "question": os.getenv("QUESTION_SERVICE_URL", "http://127.0.0.1:8104"),
-    "exam": os.getenv("EXAM_SERVICE_URL", "http://127.0.0.1:8105"),
-    "result": os.getenv("RESULT_SERVICE_URL", "http://127.0.0.1:8106"),
+    "auth": _service_urls("AUTH_SERVICE_URL", "http://127.0.0.1:8101"),
+    "user": _service_urls("USER_SERVICE_URL", "http://127.0.0.1:8102"),
+    "class": _service_urls("CLASS_SERVICE_URL", "http://127.0.0.1:8103"),
+    "question": _service_urls("QUESTION_SERVICE_URL", "http://127.0.0.1:8104"),
+    "exam": _service_urls("EXAM_SERVICE_URL", "http://127.0.0.1:8105"),
+    "result": _service_urls("RESULT_SERVICE_URL", "http://127.0.0.1:8106"),
+}
+
+# Modules exposing each service's ASGI app, for in-process dispatch.
+SERVICE_APPS = {
+    "auth": "services.auth_service.main",
+    "user": "services.user_service.main",
+    "class": "services.class_service.main",
+    "question": "services.question_service.main",
+    "exam": "services.exam_service.main",
+    "result": "services.result_service.main",
+}
+
+# Services listed here are mounted inside the gateway process and called over
+# ASGI instead of loopback HTTP, e.g. GATEWAY_INPROCESS_SERVICES="exam,result"
+# or "all". Their *_SERVICE_URL is ignored.
+INPROCESS_SERVICES = {
+    name.strip().lower()
+    for name in os.getenv("GATEWAY_INPROCESS_SERVICES", "").split(",")
+    if name.strip()
 }
+if INPROCESS_SERVICES & {"all", "*"}:
+    INPROCESS_SERVICES = set(SERVICE_APPS)
 
 ROUTE_PREFIXES = {
     "/login": "auth",
@@ -40,16 +97,187 @@ HOP_BY_HOP_HEADERS = {
     "host",
 }
 
-app = FastAPI(title="API Gateway")
+# Streaming relays request and response bodies chunk by chunk instead of
+# buffering them in gateway memory. Set GATEWAY_STREAMING=0 to buffer.
+STREAMING_ENABLED = os.getenv("GATEWAY_STREAMING", "1").strip().lower() not in {"0", "false", "no"}
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+
+
+def _env_number(name: str, default, cast=int):
+    value = os.getenv(name)
+    return cast(value) if value not in (None, "") else default
+
+
+def service_limits(service_name: str) -> UpstreamLimits:
+    """Per-service pool settings, e.g. EXAM_SERVICE_MAX_CONNECTIONS=200.
+
+    Unset values fall back to GATEWAY_* defaults shared by all services.
+    """
+    defaults = UpstreamLimits(
+        max_connections=_env_number("GATEWAY_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_env_number("GATEWAY_MAX_KEEPALIVE_CONNECTIONS", 20),
+        keepalive_expiry=_env_number("GATEWAY_KEEPALIVE_EXPIRY", 30.0, float),
+        connect_timeout=_env_number("GATEWAY_CONNECT_TIMEOUT", 5.0, float),
+        read_timeout=_env_number("GATEWAY_READ_TIMEOUT", 30.0, float),
+        pool_timeout=_env_number("GATEWAY_POOL_TIMEOUT", 10.0, float),
+        max_in_flight=_env_number("GATEWAY_MAX_IN_FLIGHT", 0),
+    )
+    prefix = f"{service_name.upper()}_SERVICE"
+    return UpstreamLimits(
+        max_connections=_env_number(f"{prefix}_MAX_CONNECTIONS", defaults.max_connections),
+        max_keepalive_connections=_env_number(
+            f"{prefix}_MAX_KEEPALIVE_CONNECTIONS", defaults.max_keepalive_connections
+        ),
+        keepalive_expiry=_env_number(f"{prefix}_KEEPALIVE_EXPIRY", defaults.keepalive_expiry, float),
+        connect_timeout=_env_number(f"{prefix}_CONNECT_TIMEOUT", defaults.connect_timeout, float),
+        read_timeout=_env_number(f"{prefix}_READ_TIMEOUT", defaults.read_timeout, float),
+        pool_timeout=_env_number(f"{prefix}_POOL_TIMEOUT", defaults.pool_timeout, float),
+        max_in_flight=_env_number(f"{prefix}_MAX_IN_FLIGHT", defaults.max_in_flight),
+    )
+
+
+def balancer_settings(service_name: str) -> BalancerSettings:
+    """Replica selection, retry and health settings for one service.
+
+    GATEWAY_BALANCE_STRATEGY is "least_outstanding" (default) or "latency";
+    every GATEWAY_* value can be overridden with a <NAME>_SERVICE_* variable.
+    """
+    prefix = f"{service_name.upper()}_SERVICE"
+
+    def setting(name: str, default, cast=int):
+        return _env_number(f"{prefix}_{name}", _env_number(f"GATEWAY_{name}", default, cast), cast)
+
+    return BalancerSettings(
+        strategy=os.getenv(
+            f"{prefix}_BALANCE_STRATEGY",
+            os.getenv("GATEWAY_BALANCE_STRATEGY", "least_outstanding"),
+        ).strip().lower(),
+        retry_attempts=setting("RETRY_ATTEMPTS", 2),
+        failure_threshold=setting("CIRCUIT_FAILURE_THRESHOLD", 5),
+        reset_timeout=setting("CIRCUIT_RESET_TIMEOUT", 10.0, float),
+        health_check_interval=setting("HEALTH_CHECK_INTERVAL", 5.0, float),
+        health_check_timeout=setting("HEALTH_CHECK_TIMEOUT", 2.0, float),
+    )
+
+
+upstreams: dict[str, UpstreamGroup] = {}
+
+# The gateway verifies bearer tokens once and forwards a signed identity, so
+# services skip their own user/class lookups. Set GATEWAY_VERIFY_TOKENS=0 to
+# leave authentication entirely to the services.
+VERIFY_TOKENS = os.getenv("GATEWAY_VERIFY_TOKENS", "1").strip().lower() not in {"0", "false", "no"}
+identity_cache = TTLCache(
+    maxsize=_env_number("GATEWAY_IDENTITY_CACHE_SIZE", 10000),
+    ttl=_env_number("GATEWAY_IDENTITY_TTL_SECONDS", 30.0, float),
+)
+register_cache("gateway_identity", identity_cache)
+
+
+def _invalidate_identity(key: str | None):
+    if key is None:
+        identity_cache.clear()
+        return
+    role, _, user_id = key.partition(":")
+    identity_cache.pop((role, int(user_id)))
+
+
+cache_events.subscribe(cache_events.ACCOUNT, _invalidate_identity)
+
+# Opt-in request coalescing: concurrent identical GETs on these routes share a
+# single upstream call. Each rule may name its auth scope:
+#   "user"    (default) callers are grouped per user id,
+#   "classes" students with the same class set share a response; use it only
+#             for routes whose output depends on class membership alone, e.g.
+#   GATEWAY_COALESCE_ROUTES="GET /exams/*=classes,GET /exams/*/questions=classes"
+COALESCE_RULES = parse_route_rules(os.getenv("GATEWAY_COALESCE_ROUTES", ""), default="user")
+single_flight = SingleFlight()
+
+# Short-TTL response cache for GETs, e.g.
+#   GATEWAY_CACHE_ROUTES="GET /exams/*=10:classes,GET /exams/*/questions=60:classes,GET /classes=10"
+# Each option is "<ttl seconds>[:<scope>]" with the same scopes as coalescing.
+CACHE_RULES = parse_route_rules(os.getenv("GATEWAY_CACHE_ROUTES", ""), default="5")
+response_cache = ResponseCache(
+    max_entries=_env_number("GATEWAY_CACHE_MAX_ENTRIES", 5000),
+    max_bytes=_env_number("GATEWAY_CACHE_MAX_BYTES", 64 * 1024 * 1024),
 )
 
+# Token-bucket limits per user and route class, "<count>/<s|m|h>[:<burst>]".
+# The first matching rule applies; set GATEWAY_RATE_LIMITS="" to disable.
+RATE_LIMIT_RULES = [
+    (pattern, RateLimit.parse(option))
+    for pattern, option in parse_route_rules(
+        os.getenv(
+            "GATEWAY_RATE_LIMITS",
+            "/exams/*/autosave=2/s:10,POST /exams/*/violations=1/s:20",
+        )
+    )
+]
+# Buckets are per process unless GATEWAY_RATE_LIMIT_REDIS_URL points every
+# gateway at one Redis.
+rate_limiter = create_rate_limiter(
+    os.getenv("GATEWAY_RATE_LIMIT_REDIS_URL", "").strip(),
+    max_keys=_env_number("GATEWAY_RATE_LIMIT_MAX_KEYS", 100000),
+)
+rejections = RejectionStats()
+REJECTED_REQUESTS = REGISTRY.counter(
+    "gateway_rejected_requests_total",
+    "Requests answered with 429 by the gateway, by reason and route class or service.",
+    ("reason", "label"),
+)
+
+# Path prefixes dropped from the response cache when a service publishes a
+# cache event (see app.core.cache_events).
+CACHE_INVALIDATION_PREFIXES = {
+    cache_events.EXAM: ["/exams"],
+    cache_events.CLASS: ["/classes", "/exams"],
+    cache_events.QUESTION: ["/questions", "/exams"],
+}
+
+
+def _invalidate_cached_paths(prefixes: list[str]):
+    def listener(_key):
+        for prefix in prefixes:
+            response_cache.invalidate_prefix(prefix)
+    return listener
+
+
+for _topic, _prefixes in CACHE_INVALIDATION_PREFIXES.items():
+    cache_events.subscribe(_topic, _invalidate_cached_paths(_prefixes))
+
+
+async def mount_service_app(service_name: str, stack: AsyncExitStack) -> httpx.ASGITransport:
+    service_app = importlib.import_module(SERVICE_APPS[service_name]).app
+    # ASGITransport does not send lifespan events, so run the app's startup
+    # and shutdown here alongside the gateway's own.
+    await stack.enter_async_context(service_app.router.lifespan_context(service_app))
+    return httpx.ASGITransport(app=service_app)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with AsyncExitStack() as stack:
+        for service_name, service_urls in SERVICE_URLS.items():
+            transport = None
+            if service_name in INPROCESS_SERVICES:
+                transport = await mount_service_app(service_name, stack)
+                service_urls = [f"http://{service_name}-service.local"]
+            group = UpstreamGroup(
+                service_name,
+                service_urls,
+                service_limits(service_name),
+                balancer_settings(service_name),
+                transport,
+            )
+            await group.start()
+            upstreams[service_name] = group
+        try:
+            yield
+        finally:
+            for group in upstreams.values():
+                await group.close()
+            upstreams.clear()
+            await rate_limiter.close()
+
 
 def resolve_service(path: str) -> str | None:
     for prefix, service_name in ROUTE_PREFIXES.items():
@@ -58,19 +286,372 @@ def resolve_service(path: str) -> str | None:
     return None
 
 
+def gateway_route_label(scope: Scope) -> str:
+    """Proxied requests are labelled by prefix ("/exams", "/exams/*"), not raw path."""
+    path = scope.get("path", "")
+    for prefix in ROUTE_PREFIXES:
+        if path == prefix:
+            return prefix
+        if path.startswith(f"{prefix}/"):
+            return f"{prefix}/*"
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+GATEWAY_OVERHEAD = REGISTRY.histogram(
+    "gateway_overhead_seconds",
+    "Request time not spent waiting for upstream response headers "
+    "(auth, caching, body relay and framework work).",
+    ("route",),
+)
+
+
+class UpstreamTimingMiddleware:
+    """Splits each proxied request's latency into upstream time and gateway overhead."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or resolve_service(scope.get("path", "")) is None:
+            await self.app(scope, receive, send)
+            return
+
+        accumulator = [0.0]
+        token = upstream_time.set(accumulator)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            upstream_time.reset(token)
+            overhead = time.perf_counter() - started - accumulator[0]
+            GATEWAY_OVERHEAD.observe(max(overhead, 0.0), route=gateway_route_label(scope))
+
+
+def _upstream_metrics() -> list[str]:
+    replicas = [
+        ((("service", name), ("replica", replica.base_url)), replica)
+        for name, group in upstreams.items()
+        for replica in group.replicas
+    ]
+    return (
+        gauge_lines(
+            "gateway_upstream_active_requests",
+            "Requests currently holding an upstream connection slot.",
+            {labels: replica.active_requests for labels, replica in replicas},
+        )
+        + gauge_lines(
+            "gateway_upstream_healthy",
+            "1 if the replica passed its last health check.",
+            {labels: int(replica.healthy) for labels, replica in replicas},
+        )
+        + gauge_lines(
+            "gateway_upstream_circuit_open",
+            "1 if the replica's circuit breaker is open.",
+            {labels: int(replica.breaker.state == replica.breaker.OPEN) for labels, replica in replicas},
+        )
+        + gauge_lines(
+            "gateway_response_cache_bytes",
+            "Bytes held by the gateway response cache.",
+            {(): response_cache.bytes},
+        )
+    )
+
+
+REGISTRY.add_collector(_upstream_metrics)
+
+
+app = FastAPI(title="API Gateway", lifespan=lifespan)
+
+app.add_middleware(UpstreamTimingMiddleware)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+app.add_middleware(MetricsMiddleware, app_name="API Gateway", route_label=gateway_route_label)
+
+
 def filtered_headers(headers: dict[str, Any]) -> dict[str, str]:
     return {
         key: value
         for key, value in headers.items()
         if key.lower() not in HOP_BY_HOP_HEADERS
+        and not key.lower().startswith(INTERNAL_HEADER_PREFIX)
     }
 
 
+def _load_principal(role: str, user_id: int) -> Principal | None:
+    db = SessionLocal()
+    try:
+        return load_principal(db, role, user_id)
+    finally:
+        db.close()
+
+
+async def resolve_principal(request: Request) -> Principal | None:
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        return None
+
+    identity = read_token_identity(token.strip())
+    if identity is None:
+        return None
+
+    user_id, role = identity
+    cached = identity_cache.get((role, user_id))
+    if cached is None:
+        try:
+            principal = await run_in_threadpool(_load_principal, role, user_id)
+        except Exception:
+            # Services still authenticate the bearer token themselves.
+            return None
+        # Missing accounts are cached as False so they are not re-queried.
+        cached = principal or False
+        identity_cache.set((role, user_id), cached)
+    return cached or None
+
+
+def upstream_headers(request: Request, request_path: str, principal: Principal | None) -> dict[str, str]:
+    headers = filtered_headers(dict(request.headers))
+    if principal is not None:
+        headers.update(sign_identity(
+            request.method,
+            request_path,
+            canonical_query(request.query_params.multi_items()),
+            principal,
+        ))
+    return headers
+
+
+def auth_scope_key(request: Request, principal: Principal | None, scope: str) -> str:
+    if principal is not None:
+        if scope == "classes" and principal.role == "student":
+            return "classes:" + ",".join(str(class_id) for class_id in sorted(principal.class_ids or []))
+        return f"{principal.role}:{principal.id}"
+    authorization = request.headers.get("authorization", "")
+    return "token:" + hashlib.sha256(authorization.encode("utf-8")).hexdigest()
+
+
+app.include_router(internal_router)
+
+
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "service": "API Gateway"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
+@app.get("/health/pools")
+async def pool_stats():
+    return {name: group.stats() for name, group in upstreams.items()}
+
+
+@app.get("/health/coalescing")
+async def coalescing_stats():
+    return {
+        "allowlist": [str(pattern) for pattern, _ in COALESCE_RULES],
+        **single_flight.stats(),
+    }
+
+
+@app.get("/health/limits")
+async def limit_stats():
+    return {
+        "backend": rate_limiter.backend,
+        "rules": {str(pattern): str(limit) for pattern, limit in RATE_LIMIT_RULES},
+        "in_flight": {
+            name: {"in_flight": group.in_flight, "max_in_flight": group.limits.max_in_flight}
+            for name, group in upstreams.items()
+        },
+        "rejected": rejections.stats(),
+    }
+
+
+@app.get("/health/cache")
+async def cache_stats():
+    return {
+        "routes": [str(pattern) for pattern, _ in CACHE_RULES],
+        **response_cache.stats(),
+    }
+
+
+def rate_limit_key(request: Request, principal: Principal | None) -> str:
+    if principal is not None or "authorization" in request.headers:
+        return auth_scope_key(request, principal, "user")
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+def too_many_requests(reason: str, label: str, retry_after: float) -> Response:
+    rejections.record(reason, label)
+    REJECTED_REQUESTS.inc(reason=reason, label=label)
+    return Response(
+        content='{"detail":"Too many requests"}',
+        status_code=429,
+        media_type="application/json",
+        headers={"retry-after": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+async def check_rate_limit(request: Request, request_path: str, principal: Principal | None) -> Response | None:
+    rule = match_route_rule(RATE_LIMIT_RULES, request.method, request_path)
+    if rule is None:
+        return None
+    pattern, limit = rule
+    retry_after = await rate_limiter.acquire(f"{pattern}|{rate_limit_key(request, principal)}", limit)
+    if retry_after > 0:
+        return too_many_requests("rate_limit", str(pattern), retry_after)
+    return None
+
+
+def has_request_body(request: Request) -> bool:
+    if "transfer-encoding" in request.headers:
+        return True
+    return request.headers.get("content-length", "0") not in {"", "0"}
+
+
+async def relay_body(group: UpstreamGroup, service_response):
+    try:
+        async for chunk in service_response.aiter_raw():
+            yield chunk
+    finally:
+        await group.release(service_response)
+
+
+async def stream_proxy(service_name: str, request_path: str, request: Request, headers: dict[str, str]):
+    group = upstreams[service_name]
+    service_response = await group.stream(
+        method=request.method,
+        path=request_path,
+        params=request.query_params,
+        content=request.stream() if has_request_body(request) else None,
+        headers=headers,
+    )
+
+    return StreamingResponse(
+        relay_body(group, service_response),
+        status_code=service_response.status_code,
+        headers=filtered_headers(dict(service_response.headers)),
+        media_type=service_response.headers.get("content-type"),
+        background=BackgroundTask(group.release, service_response),
+    )
+
+
+def to_response(service_response: httpx.Response) -> Response:
+    return Response(
+        content=service_response.content,
+        status_code=service_response.status_code,
+        headers=filtered_headers(dict(service_response.headers)),
+        media_type=service_response.headers.get("content-type"),
+    )
+
+
+async def buffered_proxy(service_name: str, request_path: str, request: Request, headers: dict[str, str]):
+    service_response = await upstreams[service_name].request(
+        method=request.method,
+        path=request_path,
+        params=request.query_params,
+        content=await request.body(),
+        headers=headers,
+    )
+    return to_response(service_response)
+
+
+async def coalesced_proxy(
+    service_name: str,
+    request_path: str,
+    request: Request,
+    headers: dict[str, str],
+    pattern: RoutePattern,
+    scope_key: str,
+):
+    key = (request_path, str(request.query_params), scope_key)
+
+    async def fetch():
+        return await upstreams[service_name].request(
+            method=request.method,
+            path=request_path,
+            params=request.query_params,
+            headers=headers,
+        )
+
+    service_response = await single_flight.do(key, str(pattern), fetch)
+    return to_response(service_response)
+
+
+def cached_response(entry: CachedResponse, request: Request, cache_status: str) -> Response:
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers={"etag": entry.etag, "x-gateway-cache": cache_status})
+
+    headers = {
+        key: value for key, value in entry.headers.items()
+        if key.lower() not in {"content-length", "etag"}
+    }
+    headers["etag"] = entry.etag
+    headers["x-gateway-cache"] = cache_status
+    return Response(
+        content=entry.body,
+        status_code=entry.status_code,
+        headers=headers,
+        media_type=entry.headers.get("content-type"),
+    )
+
+
+async def cached_proxy(
+    service_name: str,
+    request_path: str,
+    request: Request,
+    headers: dict[str, str],
+    pattern: RoutePattern,
+    option: str,
+    principal: Principal | None,
+):
+    ttl, _, scope = option.partition(":")
+    key = (request_path, str(request.query_params), auth_scope_key(request, principal, scope or "user"))
+
+    entry = response_cache.get(key)
+    if entry is not None:
+        return cached_response(entry, request, "HIT")
+
+    generation = response_cache.generation
+    # Always fetch a full body to cache, even if the client is revalidating.
+    headers = {
+        name: value for name, value in headers.items()
+        if name.lower() not in {"if-none-match", "if-modified-since"}
+    }
+
+    async def fetch():
+        return await upstreams[service_name].request(
+            method=request.method,
+            path=request_path,
+            params=request.query_params,
+            headers=headers,
+        )
+
+    service_response = await single_flight.do(("cache", *key), str(pattern), fetch)
+    if service_response.status_code != 200:
+        return to_response(service_response)
+
+    entry = CachedResponse(
+        path=request_path,
+        status_code=service_response.status_code,
+        headers=filtered_headers(dict(service_response.headers)),
+        body=service_response.content,
+        etag=service_response.headers.get("etag") or make_etag(service_response.content),
+        expires_at=time.monotonic() + float(ttl),
+    )
+    response_cache.put(key, entry, generation)
+    return cached_response(entry, request, "MISS")
+
+
 @app.api_route(
     "/{path:path}",
     methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
@@ -85,20 +666,53 @@ async def proxy(path: str, request: Request):
             media_type="application/json",
         )
 
-    target_url = f"{SERVICE_URLS[service_name]}{request_path}"
+    principal = await resolve_principal(request) if VERIFY_TOKENS else None
+    rejected = await check_rate_limit(request, request_path, principal)
+    if rejected is not None:
+        return rejected
 
-    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-        service_response = await client.request(
-            method=request.method,
-            url=target_url,
-            params=request.query_params,
-            content=await request.body(),
-            headers=filtered_headers(dict(request.headers)),
-        )
+    headers = upstream_headers(request, request_path, principal)
+    cache_rule = coalesce_rule = None
+    if request.method == "GET":
+        cache_rule = match_route_rule(CACHE_RULES, request.method, request_path)
+        coalesce_rule = match_route_rule(COALESCE_RULES, request.method, request_path)
 
-    return Response(
-        content=service_response.content,
-        status_code=service_response.status_code,
-        headers=filtered_headers(dict(service_response.headers)),
-        media_type=service_response.headers.get("content-type"),
-    )
+    try:
+        if cache_rule is not None:
+            pattern, option = cache_rule
+            return await cached_proxy(
+                service_name, request_path, request, headers, pattern, option, principal
+            )
+        if coalesce_rule is not None:
+            pattern, scope = coalesce_rule
+            return await coalesced_proxy(
+                service_name,
+                request_path,
+                request,
+                headers,
+                pattern,
+                auth_scope_key(request, principal, scope),
+            )
+        if STREAMING_ENABLED:
+            return await stream_proxy(service_name, request_path, request, headers)
+        return await buffered_proxy(service_name, request_path, request, headers)
+    except UpstreamOverloaded:
+        return too_many_requests("overloaded", service_name, 1)
+    except UpstreamPoolTimeout:
+        return Response(
+            content='{"detail":"Upstream connection pool exhausted"}',
+            status_code=503,
+            media_type="application/json",
+        )
+    except UpstreamUnavailable:
+        return Response(
+            content='{"detail":"No healthy upstream replica available"}',
+            status_code=503,
+            media_type="application/json",
+        )
+    except httpx.TransportError:
+        return Response(
+            content='{"detail":"Upstream service unavailable"}',
+            status_code=502,
+            media_type="application/json",
+        )
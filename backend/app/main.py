@@ -2,7 +2,10 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import models
+from app.core.background import workers_lifespan
 from app.core.config import CORS_ORIGINS
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.password_hasher import password_hasher
 from app.database import engine
 
 # --- IMPORT ROUTERS ---
@@ -14,11 +17,27 @@ from app.routers.questions import router as question_router
 from app.routers.exams import router as exam_router
 from app.routers.results import router as result_router
 from app.routers.auth import router as auth_router
+from app.routers.internal import router as internal_router
+from app.schema_upgrades import upgrade_schema
+from app.services.exam_deadlines import exam_deadlines
+from app.services.exam_session_store import exam_session_store
+from app.services.prewarm import WARMERS, create_prewarm_scheduler
+from app.services.violation_queue import violation_queue
 
 # Tạo bảng
 models.Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
 
-app = FastAPI(title="Quiz App Backend")
+app = FastAPI(
+    title="Quiz App Backend",
+    lifespan=workers_lifespan([
+        password_hasher,
+        exam_session_store.flusher,
+        violation_queue.flusher,
+        exam_deadlines.worker,
+        create_prewarm_scheduler(list(WARMERS)).worker,
+    ]),
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,7 +45,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+app.add_middleware(MetricsMiddleware, app_name="Quiz App Backend")
 
 # --- REGISTER ROUTERS ---
 app.include_router(auth_router)
@@ -37,8 +58,14 @@ app.include_router(class_router)
 app.include_router(question_router)
 app.include_router(exam_router)
 app.include_router(result_router)
+app.include_router(internal_router)
 
 
 @app.get("/")
 def root():
     return {"message": "Quiz API is running!"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return metrics_response()
@@ -12,3 +12,4 @@ from .exam_result import ExamResult
 from .exam_result_detail import ExamResultDetail
 from .exam_session import ExamSession
 from .exam_violation import ExamViolation
+from .account_code_sequence import AccountCodeSequence
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String
+from app.database import Base
+
+
+class AccountCodeSequence(Base):
+    """Last number handed out for each account code prefix ("SV", "GV")."""
+
+    __tablename__ = "account_code_sequence"
+
+    prefix = Column(String(10), primary_key=True)
+    last_value = Column(Integer, nullable=False, default=0)
@@ -1,9 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Exam(Base):
     __tablename__ = "exam"
+    __table_args__ = (
+        # Owner listing: WHERE created_by = ? AND id > ? ORDER BY id
+        Index("ix_exam_created_by_id", "created_by", "id"),
+        # Prewarm scan: published exams starting soon.
+        Index("ix_exam_status_start_time", "status", "start_time"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -24,10 +30,13 @@ class Exam(Base):
     max_attempts = Column(Integer, nullable=True, default=1)
     shuffle_questions = Column(Boolean, nullable=False, default=False)
     shuffle_options = Column(Boolean, nullable=False, default=False)
+    # Bumped on every edit; cached exam papers and answer keys compare it.
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     exam_questions = relationship(
         "ExamQuestion",
         back_populates="exam",
+        order_by="(ExamQuestion.position, ExamQuestion.id)",
         cascade="all, delete-orphan"
     )
 
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class ExamAllowedClass(Base):
     __tablename__ = "exam_allowed_class"
+    __table_args__ = (
+        Index("ix_exam_allowed_class_exam_class", "exam_id", "class_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exam_id = Column(Integer, ForeignKey("exam.id"))
@@ -1,13 +1,18 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class ExamQuestion(Base):
     __tablename__ = "exam_question"
+    __table_args__ = (
+        Index("ix_exam_question_exam_position", "exam_id", "position"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     exam_id = Column(Integer, ForeignKey("exam.id"))
     question_id = Column(Integer, ForeignKey("question.id"))
+    # Display order within the exam; ties fall back to id.
+    position = Column(Integer, nullable=False, default=0, server_default="0")
 
     exam = relationship("Exam", back_populates="exam_questions")
-    question = relationship("Question", back_populates="exam_links")
\ No newline at end of file
+    question = relationship("Question", back_populates="exam_links")
@@ -12,10 +12,12 @@ class ExamSession(Base):
     exam_id = Column(Integer, ForeignKey("exam.id"), nullable=False, index=True)
     student_id = Column(Integer, ForeignKey("student.id"), nullable=False, index=True)
     answers = Column(JSON, nullable=False, default=dict)
+    # Highest client autosave sequence number applied to ``answers``.
+    answers_version = Column(Integer, nullable=False, default=0, server_default="0")
     violation_count = Column(Integer, nullable=False, default=0)
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     last_saved_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
-    submitted_at = Column(DateTime(timezone=True), nullable=True)
+    submitted_at = Column(DateTime(timezone=True), nullable=True, index=True)
 
     exam = relationship("Exam")
     student = relationship("Student")
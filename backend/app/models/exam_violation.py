@@ -13,6 +13,8 @@ class ExamViolation(Base):
     exam_id = Column(Integer, ForeignKey("exam.id"), nullable=False, index=True)
     student_id = Column(Integer, ForeignKey("student.id"), nullable=False, index=True)
     reason = Column(String(255), nullable=False)
+    # Identical reports collapsed into this row by the ingestion queue.
+    occurrences = Column(Integer, nullable=False, default=1, server_default="1")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     session = relationship("ExamSession", back_populates="violations")
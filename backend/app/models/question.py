@@ -23,5 +23,7 @@ class Question(Base):
     correct_answer = Column(String(255))
     
     created_by = Column(Integer, ForeignKey("teacher.id"))
+    # Bumped on every edit; cached exam papers and answer keys compare it.
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     exam_links = relationship("ExamQuestion", back_populates="question")
@@ -6,3 +6,4 @@ from .questions import router as question_router
 from .exams import router as exam_router
 from .results import router as result_router
 from .auth import router as auth_router
+from .internal import router as internal_router
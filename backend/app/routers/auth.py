@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.database import get_db
 from app.core.jwt import create_access_token
@@ -10,9 +11,11 @@ router = APIRouter(tags=["Auth"])
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(login_data: LoginRequest, db: Session = Depends(get_db)):
+    # Async so that bcrypt waits on the hasher pool without holding a
+    # threadpool thread; only the account lookup runs in the threadpool.
     try:
-        return _login(login_data, db)
+        return await _login(login_data, db)
     except HTTPException:
         raise
     except Exception as exc:
@@ -70,10 +73,10 @@ def debug_login(login_data: LoginRequest, db: Session = Depends(get_db)):
         }
 
 
-def _login(login_data: LoginRequest, db: Session):
-    account = AccountService.find_by_username(db, login_data.username)
+async def _login(login_data: LoginRequest, db: Session):
+    account = await run_in_threadpool(AccountService.find_by_username, db, login_data.username)
 
-    if not account or not AccountService.verify_password(login_data.password, account.password):
+    if not account or not await AccountService.verify_password_async(login_data.password, account.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Sai tên đăng nhập hoặc mật khẩu",
@@ -1,27 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel
 
+from app.core.response_cache import etag_matches
 from app.core.roles import normalize_role
 from app.database import get_db
 from app.dependencies import get_current_student, get_current_user
 
 from app.schemas.exam import ExamCreate, ExamResponse, ExamUpdate
 from app.schemas.exam_session import (
+    ExamAutosavePatchRequest,
+    ExamAutosavePatchResponse,
     ExamAutosaveRequest,
     ExamSessionDetailResponse,
     ExamStartResponse,
+    ExamViolationAcceptedResponse,
     ExamViolationRequest,
-    ExamViolationResponse,
 )
 from app.schemas.question import ExamQuestionResponse
 
+from app.services.exam_access import exam_access
+from app.services.exam_paper import exam_papers
 from app.services.exam_service import ExamService
 
 
 router = APIRouter(prefix="/exams", tags=["Exams"])
 
+EXAM_PAGE_MAX = 500
+
 
 class PasswordCheckRequest(BaseModel):
     password: str
@@ -31,6 +40,10 @@ class StatusRequest(BaseModel):
     status: str
 
 
+class CloneExamRequest(BaseModel):
+    title: str | None = None
+
+
 def get_role_name(user) -> str:
     return normalize_role(user.role)
 
@@ -65,19 +78,36 @@ def require_exam_access(db: Session, exam_id: int, current_user):
     if not class_ids:
         raise HTTPException(status_code=400, detail="Student has no class")
 
-    exams = ExamService.get_exams_for_student(db, class_ids)
-    if not any(exam.id == exam_id for exam in exams):
+    if not exam_access.student_can_open(db, exam_id, class_ids):
         raise HTTPException(status_code=403, detail="You do not have access to this exam")
 
 
 @router.get("/", response_model=List[ExamResponse])
 def get_exams(
+    response: Response,
+    status_value: Optional[str] = Query(None, alias="status"),
+    starts_after: Optional[datetime] = None,
+    starts_before: Optional[datetime] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=EXAM_PAGE_MAX),
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
+    # Without ``limit`` the whole list is returned, as before. With it, pass
+    # the X-Next-Cursor header back as ``after_id`` to get the next page.
     require_teacher(current_user)
-    exams = ExamService.get_exams(db)
-    return [exam for exam in exams if str(exam.created_by) == str(current_user.id)]
+    exams = ExamService.get_exams(
+        db,
+        owner_id=current_user.id,
+        status_value=status_value,
+        starts_after=starts_after,
+        starts_before=starts_before,
+        after_id=after_id,
+        limit=limit,
+    )
+    if limit is not None and len(exams) == limit:
+        response.headers["X-Next-Cursor"] = str(exams[-1]["id"])
+    return exams
 
 
 @router.post("/", response_model=ExamResponse)
@@ -90,6 +120,23 @@ def create_exam(
     return ExamService.create_exam(db, exam, current_user.id)
 
 
+@router.post("/{exam_id}/clone", response_model=ExamResponse)
+def clone_exam(
+    exam_id: int,
+    payload: CloneExamRequest | None = None,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    require_teacher(current_user)
+    require_exam_access(db, exam_id, current_user)
+    exam = ExamService.clone_exam(
+        db, exam_id, current_user.id, title=payload.title if payload else None
+    )
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    return exam
+
+
 @router.get("/my-exams", response_model=List[ExamResponse])
 def get_my_exams(
     db: Session = Depends(get_db),
@@ -178,10 +225,38 @@ def autosave_exam(
         exam_id,
         current_student.id,
         payload.answers,
+        payload.seq,
     )
 
 
-@router.post("/{exam_id}/violations", response_model=ExamViolationResponse)
+@router.patch(
+    "/{exam_id}/autosave",
+    response_model=ExamAutosavePatchResponse,
+    response_model_exclude_none=True,
+)
+def patch_autosave_exam(
+    exam_id: int,
+    payload: ExamAutosavePatchRequest,
+    db: Session = Depends(get_db),
+    current_student=Depends(get_current_student),
+):
+    # Only changed answers are sent; writes whose seq is not newer than the
+    # stored version are dropped and answered with the current answers.
+    require_exam_access(db, exam_id, current_student)
+    return ExamService.patch_exam_session_answers(
+        db,
+        exam_id,
+        current_student.id,
+        payload.changes,
+        payload.seq,
+    )
+
+
+@router.post(
+    "/{exam_id}/violations",
+    response_model=ExamViolationAcceptedResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 def log_exam_violation(
     exam_id: int,
     payload: ExamViolationRequest,
@@ -263,16 +338,27 @@ def delete_exam(
 @router.get("/{exam_id}/questions", response_model=List[ExamQuestionResponse])
 def get_exam_questions(
     exam_id: int,
+    request: Request,
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    require_exam_access(db, exam_id, current_user)
-
-    exam = ExamService.get_exam(db, exam_id)
-    if not exam:
-        raise HTTPException(status_code=404, detail="Exam not found")
+    if get_role_name(current_user) == "teacher":
+        # The paper carries its owner, so no separate exam lookup is needed.
+        paper = exam_papers.get(db, exam_id)
+        if not paper:
+            raise HTTPException(status_code=404, detail="Exam not found")
+        if str(paper.owner_id) != str(current_user.id):
+            raise HTTPException(status_code=403, detail="You do not have access to this exam")
+    else:
+        require_exam_access(db, exam_id, current_user)
+        paper = exam_papers.get(db, exam_id)
+        if not paper:
+            raise HTTPException(status_code=404, detail="Exam not found")
 
-    return ExamService.get_exam_questions(db, exam_id)
+    headers = {"ETag": paper.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), paper.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=paper.body, media_type="application/json", headers=headers)
 
 
 @router.post("/{exam_id}/check-password")
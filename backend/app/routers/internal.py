@@ -0,0 +1,25 @@
+import json
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.core import cache_events
+from app.core.internal_auth import SIGNATURE_HEADER, verify_payload
+
+
+router = APIRouter(prefix="/_internal", include_in_schema=False)
+
+
+@router.post("/cache-events")
+async def receive_cache_event(request: Request):
+    body = await request.body()
+    if not verify_payload(body, request.headers.get(SIGNATURE_HEADER)):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid signature")
+
+    try:
+        event = json.loads(body)
+        topic = event["topic"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid event")
+
+    cache_events.dispatch(topic, event.get("key"))
+    return {"status": "ok"}
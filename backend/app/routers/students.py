@@ -4,7 +4,13 @@ from sqlalchemy.orm import Session
 
 from app.database import get_db
 from app.dependencies import get_current_admin
-from app.schemas.student import StudentCreate, StudentResponse, StudentUpdate
+from app.schemas.student import (
+    StudentBulkCreateRequest,
+    StudentBulkCreateResponse,
+    StudentCreate,
+    StudentResponse,
+    StudentUpdate,
+)
 from app.services.student_service import StudentService
 
 router = APIRouter(prefix="/students", tags=["Students"])
@@ -19,6 +25,23 @@ def create_student(
     return StudentService.create_student(db, student_in)
 
 
+@router.post("/bulk", response_model=StudentBulkCreateResponse)
+def create_students_bulk(
+    payload: StudentBulkCreateRequest,
+    db: Session = Depends(get_db),
+    current_admin=Depends(get_current_admin),
+):
+    try:
+        return StudentService.create_students_bulk(
+            db,
+            full_names=payload.full_names,
+            csv_content=payload.csv_content,
+            class_id=payload.class_id,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
 @router.get("/", response_model=List[StudentResponse])
 def get_students(
     skip: int = 0,
@@ -0,0 +1,64 @@
+"""Additive schema changes for databases created before a column existed.
+
+``create_all`` only creates missing tables, so columns and indexes added to
+existing models are applied here at startup. Every step is idempotent and
+only ever adds; anything destructive still needs a manual migration.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from app import models
+from app.models.exam import Exam
+from app.models.exam_question import ExamQuestion
+from app.models.exam_session import ExamSession
+from app.models.exam_violation import ExamViolation
+from app.models.question import Question
+
+
+# (column, statement run once right after the column is added)
+ADDED_COLUMNS = [
+    (
+        ExamQuestion.__table__.c.position,
+        # Keep the old insertion order for exams created before positions.
+        "UPDATE exam_question SET position = id",
+    ),
+    (ExamSession.__table__.c.answers_version, None),
+    (ExamViolation.__table__.c.occurrences, None),
+    (Exam.__table__.c.revision, None),
+    (Question.__table__.c.revision, None),
+]
+
+
+def _column_ddl(engine: Engine, column) -> str:
+    column_type = column.type.compile(dialect=engine.dialect)
+    ddl = f"ALTER TABLE {column.table.name} ADD COLUMN {column.name} {column_type}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    return ddl
+
+
+def upgrade_schema(engine: Engine):
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as conn:
+        for column, backfill in ADDED_COLUMNS:
+            table = column.table.name
+            if table not in existing_tables:
+                continue
+            if column.name in {c["name"] for c in inspector.get_columns(table)}:
+                continue
+            conn.execute(text(_column_ddl(engine, column)))
+            if backfill:
+                conn.execute(text(backfill))
+
+        for table in models.Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    conn.execute(CreateIndex(index))
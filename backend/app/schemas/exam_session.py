@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -9,6 +9,7 @@ class ExamStartResponse(BaseModel):
     exam_id: int
     student_id: int
     answers: Dict[str, str] = Field(default_factory=dict)
+    answers_version: int = 0
     violation_count: int = 0
     started_at: datetime | None = None
     last_saved_at: datetime | None = None
@@ -19,6 +20,22 @@ class ExamStartResponse(BaseModel):
 
 class ExamAutosaveRequest(BaseModel):
     answers: Dict[str, str] = Field(default_factory=dict)
+    seq: Optional[int] = Field(default=None, ge=1)
+
+
+class ExamAutosavePatchRequest(BaseModel):
+    # question id -> answer; null clears the answer
+    changes: Dict[str, Optional[str]] = Field(default_factory=dict)
+    seq: int = Field(ge=1)
+
+
+class ExamAutosavePatchResponse(BaseModel):
+    session_id: int
+    version: int
+    applied: bool
+    last_saved_at: datetime | None = None
+    # Only sent when the write was stale, so the client can resync.
+    answers: Optional[Dict[str, str]] = None
 
 
 class ExamViolationRequest(BaseModel):
@@ -31,11 +48,21 @@ class ExamViolationResponse(BaseModel):
     exam_id: int
     student_id: int
     reason: str
+    occurrences: int = 1
     created_at: datetime | None = None
 
     class Config:
         from_attributes = True
 
 
+class ExamViolationAcceptedResponse(BaseModel):
+    session_id: int
+    exam_id: int
+    student_id: int
+    reason: str
+    # False when the ingestion queue was full and the report was dropped.
+    queued: bool
+
+
 class ExamSessionDetailResponse(ExamStartResponse):
     violations: List[ExamViolationResponse] = Field(default_factory=list)
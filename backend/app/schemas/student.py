@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Literal, Optional
 from pydantic import BaseModel, EmailStr, Field, model_validator
 
 
@@ -21,6 +21,39 @@ class StudentUpdate(BaseModel):
     student_id: Optional[str] = None
 
 
+class StudentBulkCreateRequest(BaseModel):
+    """Either a list of full names or a CSV with a ``full_name`` column."""
+
+    full_names: List[str] = Field(default_factory=list)
+    csv_content: Optional[str] = None
+    class_id: Optional[int] = None
+
+    @model_validator(mode="after")
+    def validate_source(self):
+        if not self.full_names and not (self.csv_content or "").strip():
+            raise ValueError("Provide full_names or csv_content")
+        if self.full_names and self.csv_content:
+            raise ValueError("Provide either full_names or csv_content, not both")
+        return self
+
+
+class StudentBulkRowResult(BaseModel):
+    row: int
+    full_name: Optional[str] = None
+    status: Literal["created", "error"]
+    id: Optional[int] = None
+    username: Optional[str] = None
+    student_code: Optional[str] = None
+    message: Optional[str] = None
+
+
+class StudentBulkCreateResponse(BaseModel):
+    created_count: int
+    total_rows: int
+    class_id: Optional[int] = None
+    results: List[StudentBulkRowResult] = Field(default_factory=list)
+
+
 class StudentResponse(StudentBase):
     id: int
     role: str = "student"
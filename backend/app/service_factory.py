@@ -4,8 +4,12 @@ from fastapi import APIRouter, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app import models
+from app.core.background import BackgroundWorker, workers_lifespan
 from app.core.config import CORS_ORIGINS
+from app.core.metrics import MetricsMiddleware, metrics_response
 from app.database import engine
+from app.routers.internal import router as internal_router
+from app.schema_upgrades import upgrade_schema
 
 
 def create_service_app(
@@ -13,11 +17,13 @@ def create_service_app(
     title: str,
     routers: Iterable[APIRouter],
     create_tables: bool = False,
+    workers: Iterable[BackgroundWorker] = (),
 ) -> FastAPI:
     if create_tables:
         models.Base.metadata.create_all(bind=engine)
+        upgrade_schema(engine)
 
-    app = FastAPI(title=title)
+    app = FastAPI(title=title, lifespan=workers_lifespan(workers))
 
     app.add_middleware(
         CORSMiddleware,
@@ -26,12 +32,18 @@ def create_service_app(
         allow_methods=["*"],
         allow_headers=["*"],
     )
+    app.add_middleware(MetricsMiddleware, app_name=title)
 
     for router in routers:
         app.include_router(router)
+    app.include_router(internal_router)
 
     @app.get("/health")
     def health_check():
         return {"status": "ok", "service": title}
 
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return metrics_response()
+
     return app
@@ -1,47 +1,109 @@
 import re
+from dataclasses import dataclass
 from typing import Optional, Tuple, Type
+from sqlalchemy import literal, null, select, union_all
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException, status
-import bcrypt
 
+from app.core.password_hasher import PasswordHasherBusy, password_hasher
+from app.models.account_code_sequence import AccountCodeSequence
 from app.models.admin import Admin
 from app.models.teacher import Teacher
 from app.models.student import Student
 
 
+ACCOUNT_MODELS = (
+    ("admin", Admin),
+    ("teacher", Teacher),
+    ("student", Student),
+)
+
+
+@dataclass(frozen=True)
+class AccountRecord:
+    """One row of the admin/teacher/student account directory."""
+
+    role: str
+    id: int
+    username: str
+    password: str
+    full_name: Optional[str]
+    email: Optional[str]
+    student_code: Optional[str] = None
+
+
 class AccountService:
     CODE_WIDTH = 6
 
     @staticmethod
-    def verify_password(plain_password: str, hashed_password: str) -> bool:
-        return bcrypt.checkpw(
-            plain_password.encode("utf-8"),
-            hashed_password.encode("utf-8")
+    def password_hasher_busy() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hệ thống đang bận, vui lòng thử lại",
+            headers={"Retry-After": "1"},
         )
 
+    @staticmethod
+    def verify_password(plain_password: str, hashed_password: str) -> bool:
+        try:
+            return password_hasher.verify_sync(plain_password, hashed_password)
+        except PasswordHasherBusy:
+            raise AccountService.password_hasher_busy()
+
     @staticmethod
     def get_password_hash(password: str) -> str:
-        return bcrypt.hashpw(
-            password.encode("utf-8"),
-            bcrypt.gensalt()
-        ).decode("utf-8")
+        try:
+            return password_hasher.hash_sync(password)
+        except PasswordHasherBusy:
+            raise AccountService.password_hasher_busy()
 
     @staticmethod
-    def find_by_username(db: Session, username: str):
-        admin = db.query(Admin).filter(Admin.username == username).first()
-        if admin:
-            return admin
-        teacher = db.query(Teacher).filter(Teacher.username == username).first()
-        if teacher:
-            return teacher
-        student = db.query(Student).filter(Student.username == username).first()
-        if student:
-            return student
-        return None
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        try:
+            return await password_hasher.verify(plain_password, hashed_password)
+        except PasswordHasherBusy:
+            raise AccountService.password_hasher_busy()
 
     @staticmethod
-    def generate_account_code(db: Session, prefix: str) -> str:
+    def find_by_username(db: Session, username: str) -> Optional[AccountRecord]:
+        """Look the username up in all three account tables in one round trip.
+
+        Each branch of the UNION ALL is a probe on that table's unique
+        username index; admin wins over teacher over student as before.
+        """
+        branches = [
+            select(
+                literal(priority).label("priority"),
+                literal(role).label("role"),
+                model.id,
+                model.username,
+                model.password,
+                model.full_name,
+                model.email,
+                (model.student_code if model is Student else null()).label("student_code"),
+            ).where(model.username == username)
+            for priority, (role, model) in enumerate(ACCOUNT_MODELS)
+        ]
+        directory = union_all(*branches).subquery()
+        row = db.execute(
+            select(directory).order_by(directory.c.priority).limit(1)
+        ).first()
+        if row is None:
+            return None
+        return AccountRecord(
+            role=row.role,
+            id=row.id,
+            username=row.username,
+            password=row.password,
+            full_name=row.full_name,
+            email=row.email,
+            student_code=row.student_code,
+        )
+
+    @staticmethod
+    def _max_existing_code_number(db: Session, prefix: str) -> int:
+        # Only used once per prefix, to seed account_code_sequence.
         pattern = re.compile(rf"^{re.escape(prefix)}(\d+)$")
         max_number = 0
 
@@ -57,28 +119,63 @@ class AccountService:
                 match = pattern.match(username)
                 if match:
                     max_number = max(max_number, int(match.group(1)))
+        return max_number
+
+    @staticmethod
+    def reserve_code_numbers(db: Session, prefix: str, count: int = 1) -> range:
+        """Atomically take ``count`` consecutive numbers from the prefix counter.
+
+        Runs in its own short transaction (row lock on the counter) so the lock
+        is not held for the caller's whole request and concurrent creations
+        never receive the same number. Numbers are not returned if the caller
+        later rolls back, so codes may have gaps.
+        """
+        session = Session(bind=db.get_bind())
 
-        next_number = max_number + 1
+        def lock_sequence():
+            return (
+                session.query(AccountCodeSequence)
+                .filter(AccountCodeSequence.prefix == prefix)
+                .with_for_update()
+                .first()
+            )
+
+        try:
+            sequence = lock_sequence()
+            if sequence is None:
+                # First use of this prefix: backfill from existing usernames.
+                session.add(AccountCodeSequence(
+                    prefix=prefix,
+                    last_value=AccountService._max_existing_code_number(session, prefix),
+                ))
+                try:
+                    session.commit()
+                except IntegrityError:
+                    # Another process seeded it first; its row is locked below.
+                    session.rollback()
+                sequence = lock_sequence()
+            if sequence is None:
+                raise RuntimeError(f"Account code sequence for prefix {prefix!r} is missing after seeding it")
+
+            start = sequence.last_value + 1
+            sequence.last_value += count
+            session.commit()
+            return range(start, start + count)
+        finally:
+            session.close()
+
+    @staticmethod
+    def format_account_code(prefix: str, number: int) -> str:
+        return f"{prefix}{number:0{AccountService.CODE_WIDTH}d}"
+
+    @staticmethod
+    def generate_account_code(db: Session, prefix: str) -> str:
         while True:
-            code = f"{prefix}{next_number:0{AccountService.CODE_WIDTH}d}"
+            number = AccountService.reserve_code_numbers(db, prefix)[0]
+            code = AccountService.format_account_code(prefix, number)
+            # Usernames can still be set by hand; skip any that are taken.
             if not AccountService.find_by_username(db, code):
                 return code
-            next_number += 1
-
-    @staticmethod
-    def _exists_in_model(
-        db: Session,
-        model: Type,
-        field,
-        value: Optional[str],
-        exclude_id: Optional[int] = None
-    ) -> bool:
-        if not value:
-            return False
-        q = db.query(model).filter(field == value)
-        if exclude_id:
-            q = q.filter(model.id != exclude_id)
-        return db.query(q.exists()).scalar()
 
     @staticmethod
     def ensure_unique_identity(
@@ -91,25 +188,40 @@ class AccountService:
         exclude_model = exclude[0] if exclude else None
         exclude_id = exclude[1] if exclude else None
 
-        for model in (Admin, Teacher, Student):
-            model_exclude_id = exclude_id if exclude_model is model else None
-
-            if AccountService._exists_in_model(db, model, model.username, username, model_exclude_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username đã tồn tại"
-                )
-            if AccountService._exists_in_model(db, model, model.email, email, model_exclude_id):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email đã tồn tại"
-                )
+        # Every (table, field) probe becomes one branch of a single UNION ALL,
+        # ranked in the order the checks used to run so the reported conflict
+        # is unchanged.
+        checks = []
+        for _, model in ACCOUNT_MODELS:
+            fields = [(model.username, username, "Username đã tồn tại"),
+                      (model.email, email, "Email đã tồn tại")]
             if model is Student:
-                if AccountService._exists_in_model(db, Student, Student.student_code, student_code, model_exclude_id):
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail="Mã sinh viên đã tồn tại"
-                    )
+                fields.append((Student.student_code, student_code, "Mã sinh viên đã tồn tại"))
+            for field, value, detail in fields:
+                if not value:
+                    continue
+                condition = field == value
+                if exclude_id and exclude_model is model:
+                    condition = condition & (model.id != exclude_id)
+                checks.append((condition, detail))
+
+        if not checks:
+            return
+
+        # The probed columns are unique, so each branch yields at most one row.
+        branches = [
+            select(literal(rank).label("rank")).where(condition)
+            for rank, (condition, _) in enumerate(checks)
+        ]
+        conflicts = union_all(*branches).subquery()
+        rank = db.execute(
+            select(conflicts.c.rank).order_by(conflicts.c.rank).limit(1)
+        ).scalar()
+        if rank is not None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=checks[rank][1]
+            )
 
     @staticmethod
     def handle_db_error(e: Exception):
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException, status
 
+from app.core import cache_events
 from app.models.admin import Admin
 from app.schemas.admin import AdminCreate, AdminUpdate
 from app.services.account_service import AccountService
@@ -27,6 +28,7 @@ class AdminService:
             db.add(admin)
             db.commit()
             db.refresh(admin)
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("admin", admin.id))
             return admin
         except HTTPException:
             raise
@@ -65,6 +67,7 @@ class AdminService:
         try:
             db.commit()
             db.refresh(admin)
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("admin", admin_id))
             return admin
         except SQLAlchemyError as e:
             db.rollback()
@@ -79,6 +82,7 @@ class AdminService:
         try:
             db.delete(admin)
             db.commit()
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("admin", admin_id))
             return True
         except SQLAlchemyError as e:
             db.rollback()
@@ -0,0 +1,53 @@
+from sqlalchemy.orm import Session
+
+from app.core.config import ANSWER_KEY_CACHE_SIZE, ANSWER_KEY_TTL_SECONDS
+from app.core.metrics import register_cache
+from app.models.exam_question import ExamQuestion
+from app.models.question import Question
+from app.services.exam_content_cache import ExamContentCache, content_stamp
+
+
+def normalize_answer(answer: str | None) -> str | None:
+    """Form in which answers are compared when grading; None never matches."""
+    if not answer:
+        return None
+    return answer.strip().lower()
+
+
+class AnswerKeyCache:
+    """Exam id -> {question_id: normalized correct answer}, loaded in one query.
+
+    Used to grade submissions without fetching questions one by one. Grading
+    must never use a stale key, and question or exam edits made in other
+    services only arrive here as events when peers are configured, so every
+    read first compares the entry with the exam's content stamp.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = ExamContentCache(maxsize=maxsize, ttl=ttl, revalidate_after=0)
+
+    @staticmethod
+    def load(db: Session, exam_id: int) -> dict[int, str | None]:
+        rows = (
+            db.query(ExamQuestion.question_id, Question.correct_answer)
+            .outerjoin(Question, Question.id == ExamQuestion.question_id)
+            .filter(ExamQuestion.exam_id == exam_id)
+            .all()
+        )
+        return {question_id: normalize_answer(correct_answer) for question_id, correct_answer in rows}
+
+    def get(self, db: Session, exam_id: int) -> dict[int, str | None]:
+        answer_key = self.cache.get(db, exam_id)
+        if answer_key is None:
+            generation = self.cache.generation
+            stamp = content_stamp(db, exam_id)
+            answer_key = self.load(db, exam_id)
+            self.cache.put(exam_id, answer_key, answer_key.keys(), generation, stamp)
+        return answer_key
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+answer_keys = AnswerKeyCache(maxsize=ANSWER_KEY_CACHE_SIZE, ttl=ANSWER_KEY_TTL_SECONDS)
+register_cache("answer_key", answer_keys.cache.entries)
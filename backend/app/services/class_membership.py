@@ -0,0 +1,147 @@
+from sqlalchemy.orm import Session
+
+from app.core import cache_events
+from app.core.config import CLASS_MEMBERSHIP_CACHE_SIZE, CLASS_MEMBERSHIP_TTL_SECONDS
+from app.core.metrics import register_cache
+from app.core.ttl_cache import TTLCache
+from app.models.class_student import ClassStudent
+
+
+class ClassMembershipIndex:
+    """In-memory student -> class ids and class -> student ids maps.
+
+    Entries are loaded from ``class_students`` on first use and dropped when
+    an enrollment event for them is published (see ``ClassService``). Both
+    maps are size-bounded LRUs with a TTL as a backstop for lost events.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.by_student = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.by_class = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def class_ids_for_student(self, db: Session, student_id: int) -> list[int]:
+        class_ids = self.by_student.get(student_id)
+        if class_ids is None:
+            class_ids = tuple(
+                row[0]
+                for row in (
+                    db.query(ClassStudent.class_id)
+                    .filter(ClassStudent.student_id == student_id)
+                    .order_by(ClassStudent.id.asc())
+                    .all()
+                )
+            )
+            self.by_student.set(student_id, class_ids)
+        return list(class_ids)
+
+    def student_ids_for_class(self, db: Session, class_id: int) -> set[int]:
+        student_ids = self.by_class.get(class_id)
+        if student_ids is None:
+            student_ids = frozenset(
+                row[0]
+                for row in (
+                    db.query(ClassStudent.student_id)
+                    .filter(ClassStudent.class_id == class_id)
+                    .all()
+                )
+            )
+            self.by_class.set(class_id, student_ids)
+        return set(student_ids)
+
+    def preload(self, db: Session, class_ids: list[int], chunk_size: int = 1000) -> int:
+        """Load both maps for every student of ``class_ids`` in bulk.
+
+        Returns the number of enrolled students now cached.
+        """
+        missing_classes = [class_id for class_id in class_ids if class_id not in self.by_class]
+        if missing_classes:
+            members: dict[int, set[int]] = {class_id: set() for class_id in missing_classes}
+            for class_id, student_id in (
+                db.query(ClassStudent.class_id, ClassStudent.student_id)
+                .filter(ClassStudent.class_id.in_(missing_classes))
+                .all()
+            ):
+                members[class_id].add(student_id)
+            for class_id, student_ids in members.items():
+                self.by_class.set(class_id, frozenset(student_ids))
+
+        student_ids: set[int] = set()
+        for class_id in class_ids:
+            student_ids |= self.by_class.get(class_id, frozenset())
+
+        missing_students = [student_id for student_id in student_ids if student_id not in self.by_student]
+        for start in range(0, len(missing_students), chunk_size):
+            chunk = missing_students[start:start + chunk_size]
+            enrolled: dict[int, list[int]] = {student_id: [] for student_id in chunk}
+            for student_id, class_id in (
+                db.query(ClassStudent.student_id, ClassStudent.class_id)
+                .filter(ClassStudent.student_id.in_(chunk))
+                .order_by(ClassStudent.id.asc())
+                .all()
+            ):
+                enrolled[student_id].append(class_id)
+            for student_id, student_class_ids in enrolled.items():
+                self.by_student.set(student_id, tuple(student_class_ids))
+        return len(student_ids)
+
+    def forget_enrollment(self, class_id: int, student_id: int | None = None):
+        """Drop entries touched by an enrollment change; ``student_id=None``
+        means the whole class went away."""
+        self.by_class.pop(class_id)
+        if student_id is not None:
+            self.by_student.pop(student_id)
+        else:
+            # Which students listed the class is unknown once its entry is
+            # gone; class deletion is rare, so reload everyone lazily.
+            self.by_student.clear()
+
+    def forget_student(self, student_id: int):
+        for class_id in self.by_student.pop(student_id, ()) or ():
+            self.by_class.pop(class_id)
+
+    def stats(self) -> dict:
+        return {
+            "students": self.by_student.stats(),
+            "classes": self.by_class.stats(),
+        }
+
+
+class_membership = ClassMembershipIndex(
+    maxsize=CLASS_MEMBERSHIP_CACHE_SIZE,
+    ttl=CLASS_MEMBERSHIP_TTL_SECONDS,
+)
+register_cache("class_membership_students", class_membership.by_student)
+register_cache("class_membership_classes", class_membership.by_class)
+
+
+def _on_enrollment(key: str | None):
+    if key is None:
+        class_membership.by_class.clear()
+        class_membership.by_student.clear()
+        return
+    class_id, _, student_id = key.partition(":")
+    class_membership.forget_enrollment(
+        int(class_id),
+        int(student_id) if student_id not in ("", "*") else None,
+    )
+
+
+def _on_account(key: str | None):
+    if key is None:
+        return
+    role, _, user_id = key.partition(":")
+    if role == "student":
+        class_membership.forget_student(int(user_id))
+
+
+def _on_class(key):
+    # Published for class edits and bulk enrollment of brand-new students.
+    if key is None:
+        class_membership.by_class.clear()
+    else:
+        class_membership.by_class.pop(int(key))
+
+
+cache_events.subscribe(cache_events.CLASS, _on_class)
+cache_events.subscribe(cache_events.ENROLLMENT, _on_enrollment)
+cache_events.subscribe(cache_events.ACCOUNT, _on_account)
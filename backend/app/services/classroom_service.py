@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session, joinedload
 from fastapi import HTTPException
 
+from app.core import cache_events
 from app.models.classroom import Class
 from app.models.class_student import ClassStudent
 from app.models.student import Student
@@ -41,6 +42,7 @@ class ClassService:
         db.add(cls)
         db.commit()
         db.refresh(cls)
+        cache_events.publish(cache_events.CLASS, cls.id)
         return class_to_dict(cls)
 
     @staticmethod
@@ -82,6 +84,7 @@ class ClassService:
 
         db.commit()
         db.refresh(cls)
+        cache_events.publish(cache_events.CLASS, class_id)
         return class_to_dict(cls)
 
     @staticmethod
@@ -92,6 +95,11 @@ class ClassService:
 
         db.delete(cls)
         db.commit()
+        cache_events.publish(cache_events.CLASS, class_id)
+        cache_events.publish(cache_events.ENROLLMENT, cache_events.enrollment_key(class_id))
+        # Members' cached class lists are stale; class deletion is rare enough
+        # to drop every cached principal.
+        cache_events.publish(cache_events.ACCOUNT)
 
     # ---------- STUDENT ----------
     @staticmethod
@@ -117,6 +125,9 @@ class ClassService:
         )
         db.add(link)
         db.commit()
+        cache_events.publish(cache_events.CLASS, class_id)
+        cache_events.publish(cache_events.ENROLLMENT, cache_events.enrollment_key(class_id, student_id))
+        cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("student", student_id))
 
     @staticmethod
     def remove_student(db: Session, class_id: int, student_id: int):
@@ -129,7 +140,10 @@ class ClassService:
             raise HTTPException(status_code=404, detail="Student not in class")
 
         db.delete(link)
-        db.commit() 
+        db.commit()
+        cache_events.publish(cache_events.CLASS, class_id)
+        cache_events.publish(cache_events.ENROLLMENT, cache_events.enrollment_key(class_id, student_id))
+        cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("student", student_id))
 
     @staticmethod
     def get_available_students(db: Session, class_id: int):
@@ -0,0 +1,90 @@
+from collections.abc import Iterable
+
+from sqlalchemy import exists
+from sqlalchemy.orm import Session
+
+from app.core import cache_events
+from app.core.config import EXAM_ACCESS_CACHE_SIZE, EXAM_ACCESS_TTL_SECONDS
+from app.core.metrics import register_cache
+from app.core.ttl_cache import TTLCache
+from app.models.exam import Exam
+from app.models.exam_allowed_class import ExamAllowedClass
+
+
+class ExamAccessIndex:
+    """Answers "may a student in these classes open exam E" without scanning.
+
+    Holds exam id -> allowed class ids for published exams (an empty set for
+    drafts, closed or missing exams), loaded on first use and evicted by exam
+    and class events. With ``maxsize=0`` every check is a single EXISTS query.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.enabled = maxsize > 0
+        self.allowed_classes = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+
+    def _load(self, db: Session, exam_id: int) -> frozenset[int]:
+        rows = (
+            db.query(Exam.status, ExamAllowedClass.class_id)
+            .outerjoin(ExamAllowedClass, ExamAllowedClass.exam_id == Exam.id)
+            .filter(Exam.id == exam_id)
+            .all()
+        )
+        return frozenset(
+            class_id
+            for exam_status, class_id in rows
+            if exam_status == "published" and class_id is not None
+        )
+
+    def allowed_class_ids(self, db: Session, exam_id: int) -> frozenset[int]:
+        allowed = self.allowed_classes.get(exam_id)
+        if allowed is None:
+            allowed = self._load(db, exam_id)
+            self.allowed_classes.set(exam_id, allowed)
+        return allowed
+
+    @staticmethod
+    def _exists(db: Session, exam_id: int, class_ids: list[int]) -> bool:
+        return db.query(
+            exists().where(
+                ExamAllowedClass.exam_id == exam_id,
+                ExamAllowedClass.class_id.in_(class_ids),
+                Exam.id == ExamAllowedClass.exam_id,
+                Exam.status == "published",
+            )
+        ).scalar()
+
+    def student_can_open(self, db: Session, exam_id: int, class_ids: Iterable[int]) -> bool:
+        class_ids = list(class_ids)
+        if not class_ids:
+            return False
+        if not self.enabled:
+            return self._exists(db, exam_id, class_ids)
+        return not self.allowed_class_ids(db, exam_id).isdisjoint(class_ids)
+
+    def forget_exam(self, exam_id: int | None = None):
+        if exam_id is None:
+            self.allowed_classes.clear()
+        else:
+            self.allowed_classes.pop(exam_id)
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, **self.allowed_classes.stats()}
+
+
+exam_access = ExamAccessIndex(maxsize=EXAM_ACCESS_CACHE_SIZE, ttl=EXAM_ACCESS_TTL_SECONDS)
+register_cache("exam_access", exam_access.allowed_classes)
+
+
+def _on_exam(key):
+    exam_access.forget_exam(int(key) if key is not None else None)
+
+
+def _on_enrollment(key: str | None):
+    # Only a deleted class ("<class_id>:*") changes which classes an exam allows.
+    if key is None or key.endswith(":*"):
+        exam_access.forget_exam()
+
+
+cache_events.subscribe(cache_events.EXAM, _on_exam)
+cache_events.subscribe(cache_events.ENROLLMENT, _on_enrollment)
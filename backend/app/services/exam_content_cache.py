@@ -0,0 +1,151 @@
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core import cache_events
+from app.core.ttl_cache import TTLCache
+from app.models.exam import Exam
+from app.models.exam_question import ExamQuestion
+from app.models.question import Question
+
+
+ContentStamp = tuple[int, int, int]
+
+
+def content_stamp(db: Session, exam_id: int) -> ContentStamp | None:
+    """Cheap fingerprint of an exam's content; None if the exam is gone.
+
+    ``Exam.revision`` moves on every exam edit (question links included),
+    the revision sum on every edit of one of its questions and the count
+    when a question is deleted.
+    """
+    row = (
+        db.query(
+            Exam.revision,
+            func.count(Question.id),
+            func.coalesce(func.sum(Question.revision), 0),
+        )
+        .outerjoin(ExamQuestion, ExamQuestion.exam_id == Exam.id)
+        .outerjoin(Question, Question.id == ExamQuestion.question_id)
+        .filter(Exam.id == exam_id)
+        .group_by(Exam.id, Exam.revision)
+        .first()
+    )
+    return None if row is None else (int(row[0] or 0), int(row[1]), int(row[2]))
+
+
+@dataclass
+class _Entry:
+    value: Any
+    stamp: ContentStamp
+    checked_at: float
+
+
+class ExamContentCache:
+    """Per-exam cache of values built from the exam's questions.
+
+    Exam events drop that exam's entry; question events drop every entry
+    built from the question, found through a question -> exams index that
+    is pruned whenever the underlying cache evicts an entry. A generation
+    counter, bumped on every invalidation, keeps a build that raced with an
+    invalidation from being stored.
+
+    Events only reach other processes when peers are configured, so an
+    entry is also trusted for ``revalidate_after`` seconds only; after that
+    the next ``get`` compares it with ``content_stamp`` (0 = on every get).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, revalidate_after: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl, on_evict=self._on_evict)
+        self.revalidate_after = revalidate_after
+        self._question_ids: dict[int, tuple[int, ...]] = {}
+        self._exams_by_question: dict[int, set[int]] = {}
+        # Reentrant: TTLCache.set inside put may call _on_evict.
+        self._lock = threading.RLock()
+        self.generation = 0
+        cache_events.subscribe(cache_events.EXAM, self._on_exam)
+        cache_events.subscribe(cache_events.QUESTION, self._on_question)
+
+    def get(self, db: Session, exam_id: int) -> Any:
+        entry = self.entries.get(exam_id)
+        if entry is None:
+            return None
+        now = time.monotonic()
+        if now - entry.checked_at < self.revalidate_after:
+            return entry.value
+        if content_stamp(db, exam_id) != entry.stamp:
+            self.forget_exam(exam_id)
+            return None
+        entry.checked_at = now
+        return entry.value
+
+    def put(
+        self,
+        exam_id: int,
+        value: Any,
+        question_ids: Iterable[int],
+        generation: int,
+        stamp: ContentStamp | None,
+    ):
+        """Store ``value``; ``stamp`` must be read before building it."""
+        if stamp is None:
+            return
+        question_ids = tuple(question_ids)
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._unindex(exam_id)
+            self.entries.set(exam_id, _Entry(value, stamp, time.monotonic()))
+            self._question_ids[exam_id] = question_ids
+            for question_id in question_ids:
+                self._exams_by_question.setdefault(question_id, set()).add(exam_id)
+
+    def _unindex(self, exam_id: int):
+        for question_id in self._question_ids.pop(exam_id, ()):
+            exam_ids = self._exams_by_question.get(question_id)
+            if exam_ids is not None:
+                exam_ids.discard(exam_id)
+                if not exam_ids:
+                    del self._exams_by_question[question_id]
+
+    def _on_evict(self, exam_id: int):
+        with self._lock:
+            # The exam may have been stored again since it was evicted.
+            if exam_id not in self.entries:
+                self._unindex(exam_id)
+
+    def forget_exam(self, exam_id: int | None = None):
+        with self._lock:
+            self.generation += 1
+            if exam_id is None:
+                self.entries.clear()
+                self._question_ids.clear()
+                self._exams_by_question.clear()
+                return
+            self.entries.pop(exam_id)
+            self._unindex(exam_id)
+
+    def forget_question(self, question_id: int):
+        with self._lock:
+            exam_ids = list(self._exams_by_question.get(question_id, ()))
+        for exam_id in exam_ids:
+            self.forget_exam(exam_id)
+
+    def _on_exam(self, key):
+        self.forget_exam(int(key) if key is not None else None)
+
+    def _on_question(self, key):
+        if key is None:
+            self.forget_exam()
+        else:
+            self.forget_question(int(key))
+
+    def stats(self) -> dict:
+        with self._lock:
+            indexed_questions = len(self._exams_by_question)
+        return {**self.entries.stats(), "indexed_questions": indexed_questions}
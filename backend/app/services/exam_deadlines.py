@@ -0,0 +1,223 @@
+import heapq
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from app.core.background import PeriodicWorker
+from app.core.config import (
+    DEADLINE_BATCH_SIZE,
+    DEADLINE_CHECK_INTERVAL_SECONDS,
+    DEADLINE_GRACE_SECONDS,
+    DEADLINE_RESYNC_SECONDS,
+)
+from app.core.metrics import REGISTRY, gauge_lines
+from app.database import SessionLocal
+from app.models.exam import Exam
+from app.models.exam_session import ExamSession
+from app.services.exam_result_service import ResultService
+from app.services.exam_session_store import exam_session_store
+
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_CLOSED = REGISTRY.counter(
+    "exam_deadline_closed_sessions_total",
+    "Sessions closed because their time ran out, by outcome (graded, or closed without a result).",
+    ("outcome",),
+)
+DEADLINE_CLOSE_LAG = REGISTRY.histogram(
+    "exam_deadline_close_lag_seconds",
+    "Time from a session's deadline (grace included) to its auto-submission.",
+    buckets=(0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+DEADLINE_ERRORS = REGISTRY.counter(
+    "exam_deadline_errors_total",
+    "Deadline batches that failed and were retried on the next check.",
+)
+
+
+def session_deadline(
+    started_at: datetime | None, duration_minutes: int | None, end_time: datetime | None
+) -> datetime | None:
+    """When a session's time runs out: ``started_at`` plus the exam duration,
+    or the exam's ``end_time`` if that comes first. None means no limit."""
+    limits = []
+    if started_at is not None and duration_minutes:
+        limits.append(started_at.replace(tzinfo=None) + timedelta(minutes=duration_minutes))
+    if end_time is not None:
+        limits.append(end_time.replace(tzinfo=None))
+    return min(limits) if limits else None
+
+
+class DeadlineScheduler:
+    """Auto-submits open exam sessions whose time has run out.
+
+    Open sessions are kept in a min-heap ordered by deadline, so each check
+    only pops the expired ones. Those rows are then re-read under a row lock
+    and closed by ``ResultService.close_expired_sessions`` in batches of
+    ``batch_size``, which grades them from their saved answers unless the
+    submission rules (end_time, attempt limit) forbid it. A session
+    whose deadline moved (the exam was edited) is pushed back with the new
+    one.
+
+    The heap is loaded from the open sessions on the first check and again
+    every ``resync_interval`` seconds, which covers restarts and sessions
+    opened by other processes. ``ExamService`` schedules sessions it opens.
+    """
+
+    def __init__(self, interval: float, grace: float, batch_size: int, resync_interval: float):
+        self.grace = timedelta(seconds=grace)
+        self.batch_size = batch_size
+        self.resync_interval = resync_interval
+        self._heap: list[tuple[datetime, int, int, int]] = []
+        # session id -> current deadline; heap entries that disagree are stale.
+        self._deadlines: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._synced_at: float | None = None
+        self.worker = PeriodicWorker("exam-deadline-enforcer", interval, self.run, final_run=False)
+
+    def schedule(self, session_id: int, exam_id: int, student_id: int, deadline: datetime | None):
+        # Processes that do not run the worker keep no schedule.
+        if deadline is None or not self.worker.running:
+            return
+        with self._lock:
+            if self._deadlines.get(session_id) == deadline:
+                return
+            self._deadlines[session_id] = deadline
+            heapq.heappush(self._heap, (deadline, session_id, exam_id, student_id))
+
+    def rebuild(self) -> int:
+        """Schedule every open session; returns how many have a deadline."""
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(
+                    ExamSession.id,
+                    ExamSession.exam_id,
+                    ExamSession.student_id,
+                    ExamSession.started_at,
+                    Exam.duration_minutes,
+                    Exam.end_time,
+                )
+                .join(Exam, Exam.id == ExamSession.exam_id)
+                .filter(ExamSession.submitted_at.is_(None))
+                .all()
+            )
+        finally:
+            db.close()
+
+        scheduled = 0
+        for session_id, exam_id, student_id, started_at, duration_minutes, end_time in rows:
+            deadline = session_deadline(started_at, duration_minutes, end_time)
+            if deadline is not None:
+                self.schedule(session_id, exam_id, student_id, deadline)
+                scheduled += 1
+        self._synced_at = time.monotonic()
+        return scheduled
+
+    def _pop_due(self, now: datetime) -> list[tuple[datetime, int, int, int]]:
+        due = []
+        with self._lock:
+            while self._heap and len(due) < self.batch_size and self._heap[0][0] + self.grace <= now:
+                entry = heapq.heappop(self._heap)
+                if self._deadlines.get(entry[1]) == entry[0]:
+                    del self._deadlines[entry[1]]
+                    due.append(entry)
+        return due
+
+    def _reschedule(self, entries):
+        for deadline, session_id, exam_id, student_id in entries:
+            self.schedule(session_id, exam_id, student_id, deadline)
+
+    def _close(self, due, now: datetime) -> int:
+        # Buffered autosaves of this process must reach the rows first.
+        exam_session_store.forget_many([(exam_id, student_id) for _, _, exam_id, student_id in due])
+
+        later = []
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(ExamSession, Exam.duration_minutes, Exam.end_time)
+                .join(Exam, Exam.id == ExamSession.exam_id)
+                .filter(
+                    ExamSession.id.in_([session_id for _, session_id, _, _ in due]),
+                    ExamSession.submitted_at.is_(None),
+                )
+                # Rows being submitted right now are left to that submission.
+                .with_for_update(skip_locked=True, of=ExamSession)
+                .all()
+            )
+            expired = []
+            deadlines = []
+            for session, duration_minutes, end_time in rows:
+                deadline = session_deadline(session.started_at, duration_minutes, end_time)
+                if deadline is None:
+                    continue
+                if deadline + self.grace > now:
+                    later.append((deadline, session.id, session.exam_id, session.student_id))
+                    continue
+                expired.append(session)
+                deadlines.append(deadline)
+
+            graded = 0
+            if expired:
+                graded = len(ResultService.close_expired_sessions(db, expired))
+            else:
+                db.rollback()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        self._reschedule(later)
+        for deadline in deadlines:
+            DEADLINE_CLOSE_LAG.observe((now - deadline - self.grace).total_seconds())
+        DEADLINE_CLOSED.inc(graded, outcome="graded")
+        DEADLINE_CLOSED.inc(len(expired) - graded, outcome="closed")
+        return len(expired)
+
+    def run(self) -> int:
+        if self._synced_at is None or time.monotonic() - self._synced_at >= self.resync_interval:
+            self.rebuild()
+
+        now = datetime.now()
+        closed = 0
+        while True:
+            due = self._pop_due(now)
+            if not due:
+                break
+            try:
+                closed += self._close(due, now)
+            except Exception:
+                self._reschedule(due)
+                DEADLINE_ERRORS.inc()
+                logger.exception("Closing %d expired exam sessions failed", len(due))
+                break
+        if closed:
+            logger.info("Auto-submitted %d expired exam session(s)", closed)
+        return closed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"scheduled": len(self._deadlines), "heap": len(self._heap)}
+
+
+exam_deadlines = DeadlineScheduler(
+    interval=DEADLINE_CHECK_INTERVAL_SECONDS,
+    grace=DEADLINE_GRACE_SECONDS,
+    batch_size=DEADLINE_BATCH_SIZE,
+    resync_interval=DEADLINE_RESYNC_SECONDS,
+)
+
+
+def _deadline_metrics() -> list[str]:
+    return gauge_lines(
+        "exam_deadline_scheduled_sessions",
+        "Open sessions with a deadline held by the deadline worker.",
+        {(): exam_deadlines.stats()["scheduled"]},
+    )
+
+
+REGISTRY.add_collector(_deadline_metrics)
@@ -0,0 +1,90 @@
+from dataclasses import dataclass
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.core.config import (
+    EXAM_PAPER_CACHE_SIZE,
+    EXAM_PAPER_REVALIDATE_SECONDS,
+    EXAM_PAPER_TTL_SECONDS,
+)
+from app.core.metrics import register_cache
+from app.core.response_cache import make_etag
+from app.models.exam import Exam
+from app.schemas.question import ExamQuestionResponse
+from app.services.exam_content_cache import ExamContentCache, content_stamp
+from app.services.exam_service import ExamService
+
+
+_paper_adapter = TypeAdapter(list[ExamQuestionResponse])
+
+
+@dataclass(frozen=True)
+class ExamPaper:
+    """Immutable snapshot of an exam's questions as sent to clients (no answers)."""
+
+    exam_id: int
+    owner_id: int
+    status: str
+    question_ids: tuple[int, ...]
+    body: bytes
+    etag: str
+
+
+class ExamPaperCompiler:
+    """Compiles exams into pre-encoded JSON papers and caches published ones.
+
+    A cached paper is served without touching the database for up to
+    ``revalidate_after`` seconds, then checked against the exam's content
+    stamp. Exam events drop the exam's paper; question events drop every
+    cached paper containing the question. Drafts are compiled on each
+    request since they are still being edited.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, revalidate_after: float):
+        self.cache = ExamContentCache(maxsize=maxsize, ttl=ttl, revalidate_after=revalidate_after)
+
+    def compile(self, db: Session, exam_id: int) -> ExamPaper | None:
+        exam = (
+            db.query(Exam.id, Exam.created_by, Exam.status)
+            .filter(Exam.id == exam_id)
+            .first()
+        )
+        if exam is None:
+            return None
+
+        questions = _paper_adapter.validate_python(
+            ExamService.get_exam_questions(db, exam_id), from_attributes=True
+        )
+        body = _paper_adapter.dump_json(questions)
+        return ExamPaper(
+            exam_id=exam.id,
+            owner_id=exam.created_by,
+            status=exam.status,
+            question_ids=tuple(question.id for question in questions),
+            body=body,
+            etag=make_etag(body),
+        )
+
+    def get(self, db: Session, exam_id: int) -> ExamPaper | None:
+        paper = self.cache.get(db, exam_id)
+        if paper is not None:
+            return paper
+
+        generation = self.cache.generation
+        stamp = content_stamp(db, exam_id)
+        paper = self.compile(db, exam_id)
+        if paper is not None and paper.status == "published":
+            self.cache.put(exam_id, paper, paper.question_ids, generation, stamp)
+        return paper
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+exam_papers = ExamPaperCompiler(
+    maxsize=EXAM_PAPER_CACHE_SIZE,
+    ttl=EXAM_PAPER_TTL_SECONDS,
+    revalidate_after=EXAM_PAPER_REVALIDATE_SECONDS,
+)
+register_cache("exam_paper", exam_papers.cache.entries)
@@ -4,6 +4,7 @@ from typing import List
 from datetime import datetime
 from fastapi import HTTPException, status
 
+from app.core import cache_events
 from app.models.exam_result import ExamResult
 from app.models.exam_result_detail import ExamResultDetail
 from app.models.question import Question, DifficultyLevel
@@ -13,6 +14,8 @@ from app.models.exam_allowed_class import ExamAllowedClass
 from app.models.class_student import ClassStudent
 from app.models.exam_session import ExamSession
 from app.schemas.exam_result_detail import ExamResultDetailBase
+from app.services.answer_keys import answer_keys
+from app.services.exam_session_store import exam_session_store
 
 
 class ResultService:
@@ -83,6 +86,8 @@ class ResultService:
                     detail=f"Attempt limit reached ({exam.max_attempts})"
                 )
 
+        # Write out autosaves buffered in this process before closing the session.
+        exam_session_store.forget(exam_id, student_id)
         session = (
             db.query(ExamSession)
             .filter(
@@ -91,58 +96,159 @@ class ResultService:
                 ExamSession.submitted_at.is_(None),
             )
             .order_by(ExamSession.id.desc())
+            # Serializes with the deadline worker closing the same session.
+            .with_for_update()
             .first()
         )
-        started_at = session.started_at if session else datetime.now()
 
+        db_result = ResultService._grade(
+            db,
+            exam_id,
+            student_id,
+            [(ans.question_id, ans.student_answer) for ans in answers],
+            session,
+        )
+        db.commit()
+        db.refresh(db_result)
+        if session:
+            cache_events.publish(
+                cache_events.EXAM_SESSION, cache_events.exam_session_key(exam_id, student_id)
+            )
+        return db_result
+
+    @staticmethod
+    def _grade(
+        db: Session,
+        exam_id: int,
+        student_id: int,
+        answers: list[tuple[int, str]],
+        session: ExamSession | None,
+        answer_key: dict[int, str | None] | None = None,
+    ) -> ExamResult:
+        """Add the graded result for ``answers`` and close ``session``.
+
+        Shared by student submissions and the deadline worker; the caller
+        commits.
+        """
+        now = datetime.now()
         db_result = ExamResult(
             exam_id=exam_id,
             student_id=student_id,
-            started_at=started_at,
+            started_at=session.started_at if session else now,
             total_score=0.0
         )
         db.add(db_result)
-        db.flush()
 
-        exam_question_links = db.query(ExamQuestion).filter(ExamQuestion.exam_id == exam_id).all()
-        exam_question_ids = {link.question_id for link in exam_question_links}
-        total_questions = len(exam_question_ids)
+        if answer_key is None:
+            answer_key = answer_keys.get(db, exam_id)
+        total_questions = len(answer_key)
 
         correct_count = 0
 
-        for ans in answers:
-            if ans.question_id not in exam_question_ids:
+        for question_id, student_answer in answers:
+            if question_id not in answer_key:
                 continue
 
-            question = db.query(Question).filter(Question.id == ans.question_id).first()
+            expected = answer_key[question_id]
+            is_correct = expected is not None and expected == student_answer.strip().lower()
+            if is_correct:
+                correct_count += 1
 
-            is_correct = False
-            if question and question.correct_answer:
-                if question.correct_answer.strip().lower() == ans.student_answer.strip().lower():
-                    is_correct = True
-                    correct_count += 1
-
-            detail = ExamResultDetail(
-                result_id=db_result.id,
-                question_id=ans.question_id,
-                student_answer=ans.student_answer,
+            db.add(ExamResultDetail(
+                result=db_result,
+                question_id=question_id,
+                student_answer=student_answer,
                 is_correct=is_correct
-            )
-            db.add(detail)
+            ))
 
         db_result.total_score = (correct_count / total_questions) * 10 if total_questions > 0 else 0.0
         if session:
-            session.submitted_at = datetime.now()
+            session.submitted_at = now
             session.answers = {
-                str(ans.question_id): ans.student_answer
-                for ans in answers
-                if ans.question_id in exam_question_ids
+                str(question_id): student_answer
+                for question_id, student_answer in answers
+                if question_id in answer_key
             }
-            session.last_saved_at = datetime.now()
-        db.commit()
-        db.refresh(db_result)
+            session.last_saved_at = now
         return db_result
 
+    @staticmethod
+    def close_expired_sessions(db: Session, sessions: List[ExamSession]) -> List[ExamResult]:
+        """Grade and close sessions whose time ran out, from their saved answers.
+
+        ``sessions`` must be open rows locked by the caller; everything is
+        committed together. A session is only graded when ``submit_exam``
+        would have accepted it: the exam still exists, the session started
+        before ``end_time`` and the attempt limit is not reached.
+        A session the student submitted another attempt from while it was
+        open is a leftover and is not graded either. Those are just marked
+        submitted.
+        """
+        if not sessions:
+            return []
+        exam_ids = {session.exam_id for session in sessions}
+        student_ids = {session.student_id for session in sessions}
+        exams = {
+            exam.id: exam
+            for exam in db.query(Exam.id, Exam.end_time, Exam.max_attempts)
+            .filter(Exam.id.in_(exam_ids))
+            .all()
+        }
+        attempts = {
+            (exam_id, student_id): (count, last_finished)
+            for exam_id, student_id, count, last_finished in (
+                db.query(
+                    ExamResult.exam_id,
+                    ExamResult.student_id,
+                    func.count(ExamResult.id),
+                    func.max(ExamResult.finished_at),
+                )
+                .filter(ExamResult.exam_id.in_(exam_ids), ExamResult.student_id.in_(student_ids))
+                .group_by(ExamResult.exam_id, ExamResult.student_id)
+                .all()
+            )
+        }
+
+        results = []
+        answer_key_by_exam: dict[int, dict] = {}
+        now = datetime.now()
+        for session in sessions:
+            exam = exams.get(session.exam_id)
+            count, last_finished = attempts.get((session.exam_id, session.student_id), (0, None))
+            started_at = session.started_at.replace(tzinfo=None) if session.started_at else None
+            gradable = (
+                exam is not None
+                and (exam.end_time is None or started_at is None or started_at <= exam.end_time.replace(tzinfo=None))
+                and (exam.max_attempts is None or count < exam.max_attempts)
+                and (last_finished is None or started_at is None or last_finished.replace(tzinfo=None) < started_at)
+            )
+            if not gradable:
+                session.submitted_at = now
+                continue
+
+            if session.exam_id not in answer_key_by_exam:
+                answer_key_by_exam[session.exam_id] = answer_keys.get(db, session.exam_id)
+            answers = [
+                (int(question_id), str(value))
+                for question_id, value in (session.answers or {}).items()
+                if str(question_id).isdigit() and value is not None
+            ]
+            results.append(ResultService._grade(
+                db,
+                session.exam_id,
+                session.student_id,
+                answers,
+                session,
+                answer_key_by_exam[session.exam_id],
+            ))
+        db.commit()
+        for session in sessions:
+            cache_events.publish(
+                cache_events.EXAM_SESSION,
+                cache_events.exam_session_key(session.exam_id, session.student_id),
+            )
+        return results
+
     # --- READ ---
     @staticmethod
     def get_result(db: Session, result_id: int):
@@ -198,7 +304,7 @@ class ResultService:
             db.query(ExamQuestion)
             .options(joinedload(ExamQuestion.question))
             .filter(ExamQuestion.exam_id == result.exam_id)
-            .order_by(ExamQuestion.id.asc())
+            .order_by(ExamQuestion.position.asc(), ExamQuestion.id.asc())
             .all()
         )
 
@@ -327,7 +433,7 @@ class ResultService:
             db.query(Question)
             .join(ExamQuestion, Question.id == ExamQuestion.question_id)
             .filter(ExamQuestion.exam_id == exam_id)
-            .order_by(ExamQuestion.id.asc())
+            .order_by(ExamQuestion.position.asc(), ExamQuestion.id.asc())
             .all()
         )
 
@@ -1,16 +1,20 @@
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session, joinedload
 from datetime import datetime
 from fastapi import HTTPException, status
 
+from app.core import cache_events
 from app.models.exam import Exam
 from app.models.exam_question import ExamQuestion
 from app.models.exam_allowed_class import ExamAllowedClass
 from app.models.exam_result import ExamResult
 from app.models.exam_session import ExamSession
-from app.models.exam_violation import ExamViolation
 from app.models.question import Question
 
 from app.schemas.exam import ExamCreate
+from app.services.exam_deadlines import exam_deadlines, session_deadline
+from app.services.exam_session_store import SessionClosed, SessionState, exam_session_store
+from app.services.violation_queue import violation_queue
 
 
 class ExamService:
@@ -18,6 +22,128 @@ class ExamService:
     # EXAM CRUD (NO AUTH / NO ROLE)
     # =====================================================
 
+    @staticmethod
+    def _insert_links(
+        db: Session,
+        exam_id: int,
+        class_ids: list[int],
+        question_ids: list[int],
+    ):
+        # One multi-row INSERT per link table instead of one per ORM object.
+        if class_ids:
+            db.execute(
+                insert(ExamAllowedClass),
+                [{"exam_id": exam_id, "class_id": cls_id} for cls_id in class_ids],
+            )
+        if question_ids:
+            db.execute(
+                insert(ExamQuestion),
+                [
+                    {"exam_id": exam_id, "question_id": q_id, "position": position}
+                    for position, q_id in enumerate(question_ids)
+                ],
+            )
+
+    @staticmethod
+    def _sync_allowed_classes(db: Session, exam_id: int, class_ids: list[int]):
+        """Insert only added class links and delete only removed ones."""
+        wanted = list(dict.fromkeys(class_ids))
+        current = {
+            row[0]
+            for row in db.query(ExamAllowedClass.class_id)
+            .filter(ExamAllowedClass.exam_id == exam_id)
+            .all()
+        }
+
+        removed = current.difference(wanted)
+        if removed:
+            db.query(ExamAllowedClass).filter(
+                ExamAllowedClass.exam_id == exam_id,
+                ExamAllowedClass.class_id.in_(removed),
+            ).delete(synchronize_session=False)
+
+        added = [cls_id for cls_id in wanted if cls_id not in current]
+        if added:
+            db.execute(
+                insert(ExamAllowedClass),
+                [{"exam_id": exam_id, "class_id": cls_id} for cls_id in added],
+            )
+
+    @staticmethod
+    def _sync_questions(
+        db: Session,
+        exam_id: int,
+        question_ids: list[int],
+        append_only: bool = False,
+    ):
+        """Bring the exam's question links to ``question_ids`` in that order.
+
+        Only added links are inserted, removed ones deleted and kept ones
+        whose position changed updated; unchanged rows are not touched.
+        With ``append_only`` existing links are kept as they are and new ids
+        go after them.
+        """
+        wanted = list(dict.fromkeys(question_ids))
+        current = {
+            q_id: (link_id, position)
+            for link_id, q_id, position in db.query(
+                ExamQuestion.id, ExamQuestion.question_id, ExamQuestion.position
+            )
+            .filter(ExamQuestion.exam_id == exam_id)
+            .all()
+        }
+
+        if append_only:
+            next_position = max((pos for _, pos in current.values()), default=-1) + 1
+            targets = {q_id: position for q_id, (_, position) in current.items()}
+            for q_id in wanted:
+                if q_id not in targets:
+                    targets[q_id] = next_position
+                    next_position += 1
+        else:
+            targets = {q_id: position for position, q_id in enumerate(wanted)}
+
+        removed = current.keys() - targets.keys()
+        if removed:
+            db.query(ExamQuestion).filter(
+                ExamQuestion.exam_id == exam_id,
+                ExamQuestion.question_id.in_(removed),
+            ).delete(synchronize_session=False)
+
+        added = [
+            {"exam_id": exam_id, "question_id": q_id, "position": position}
+            for q_id, position in targets.items()
+            if q_id not in current
+        ]
+        if added:
+            db.execute(insert(ExamQuestion), added)
+
+        moved = [
+            {"id": current[q_id][0], "position": position}
+            for q_id, position in targets.items()
+            if q_id in current and current[q_id][1] != position
+        ]
+        if moved:
+            db.execute(update(ExamQuestion), moved)
+
+    @staticmethod
+    def _bump_revision(db: Session, exam_id: int):
+        # Lets caches in other processes notice the edit without an event.
+        db.query(Exam).filter(Exam.id == exam_id).update(
+            {Exam.revision: Exam.revision + 1}, synchronize_session=False
+        )
+
+    @staticmethod
+    def _exam_to_dict(db_exam: Exam, class_ids: list[int], question_ids: list[int]) -> dict:
+        # Read before commit expires the instance, so no refresh is needed.
+        data = {
+            column.key: getattr(db_exam, column.key)
+            for column in Exam.__mapper__.column_attrs
+        }
+        data["allowed_classes"] = list(class_ids)
+        data["exam_questions"] = list(question_ids)
+        return data
+
     @staticmethod
     def create_exam(
         db: Session,
@@ -26,52 +152,129 @@ class ExamService:
     ):
         exam_data = exam_in.model_dump()
 
-        class_ids = exam_data.pop("class_ids", [])
-        question_ids = exam_data.pop("questions", [])
+        class_ids = list(dict.fromkeys(exam_data.pop("class_ids", [])))
+        question_ids = list(dict.fromkeys(exam_data.pop("questions", [])))
 
         exam_data["created_by"] = owner_id
 
         db_exam = Exam(**exam_data)
         db.add(db_exam)
+        db.flush()
+
+        ExamService._insert_links(db, db_exam.id, class_ids, question_ids)
+        result = ExamService._exam_to_dict(db_exam, class_ids, question_ids)
+
         db.commit()
-        db.refresh(db_exam)
+        cache_events.publish(cache_events.EXAM, result["id"])
+        return result
 
-        # allowed classes
-        for cls_id in class_ids:
-            db.add(
-                ExamAllowedClass(
-                    exam_id=db_exam.id,
-                    class_id=cls_id
-                )
-            )
+    @staticmethod
+    def clone_exam(
+        db: Session,
+        exam_id: int,
+        owner_id: int,
+        title: str | None = None,
+    ):
+        """Copy an exam with its questions and classes as a new draft."""
+        source = ExamService.get_exam(db, exam_id)
+        if not source:
+            return None
 
-        # questions
-        for q_id in question_ids:
-            db.add(
-                ExamQuestion(
-                    exam_id=db_exam.id,
-                    question_id=q_id
-                )
-            )
+        exam_data = {
+            column.key: getattr(source, column.key)
+            for column in Exam.__mapper__.column_attrs
+            if column.key not in {"id", "revision"}
+        }
+        exam_data.update(
+            title=title or f"{source.title} (copy)",
+            status="draft",
+            created_by=owner_id,
+        )
+        class_ids = [link.class_id for link in source.allowed_classes]
+        question_ids = [link.question_id for link in source.exam_questions]
+
+        db_exam = Exam(**exam_data)
+        db.add(db_exam)
+        db.flush()
+
+        ExamService._insert_links(db, db_exam.id, class_ids, question_ids)
+        result = ExamService._exam_to_dict(db_exam, class_ids, question_ids)
 
         db.commit()
-        db.refresh(db_exam)
-        return db_exam
+        cache_events.publish(cache_events.EXAM, result["id"])
+        return result
 
     # =====================================================
     # READ
     # =====================================================
 
+    EXAM_STATUSES = {"draft", "published", "closed"}
+
     @staticmethod
-    def get_exams(db: Session):
-        return (
-            db.query(Exam)
-            .options(
-                joinedload(Exam.allowed_classes),
-                joinedload(Exam.exam_questions)
-            )
+    def _link_ids_by_exam(db: Session, column, order_by, exam_ids: list[int]) -> dict[int, list[int]]:
+        link_model = column.class_
+        grouped: dict[int, list[int]] = {}
+        rows = (
+            db.query(link_model.exam_id, column)
+            .filter(link_model.exam_id.in_(exam_ids))
+            .order_by(link_model.exam_id, *order_by)
             .all()
         )
+        for exam_id, linked_id in rows:
+            grouped.setdefault(exam_id, []).append(linked_id)
+        return grouped
+
+    @staticmethod
+    def get_exams(
+        db: Session,
+        owner_id: int | None = None,
+        status_value: str | None = None,
+        starts_after: datetime | None = None,
+        starts_before: datetime | None = None,
+        after_id: int | None = None,
+        limit: int | None = None,
+    ) -> list[dict]:
+        """List exams filtered and paginated in SQL, ordered by id.
+
+        ``after_id`` is the keyset cursor (the last id of the previous page).
+        Class and question ids come from one narrow query per link table
+        rather than eager-loading both collections on every exam.
+        """
+        if status_value is not None and status_value not in ExamService.EXAM_STATUSES:
+            raise HTTPException(status_code=400, detail="Invalid exam status")
+
+        query = db.query(Exam)
+        if owner_id is not None:
+            query = query.filter(Exam.created_by == owner_id)
+        if status_value is not None:
+            query = query.filter(Exam.status == status_value)
+        if starts_after is not None:
+            query = query.filter(Exam.start_time >= starts_after)
+        if starts_before is not None:
+            query = query.filter(Exam.start_time < starts_before)
+        if after_id is not None:
+            query = query.filter(Exam.id > after_id)
+        query = query.order_by(Exam.id.asc())
+        if limit is not None:
+            query = query.limit(limit)
+
+        exams = query.all()
+        if not exams:
+            return []
+
+        exam_ids = [exam.id for exam in exams]
+        class_ids = ExamService._link_ids_by_exam(
+            db, ExamAllowedClass.class_id, (ExamAllowedClass.id,), exam_ids
+        )
+        question_ids = ExamService._link_ids_by_exam(
+            db, ExamQuestion.question_id, (ExamQuestion.position, ExamQuestion.id), exam_ids
+        )
+        return [
+            ExamService._exam_to_dict(
+                exam, class_ids.get(exam.id, []), question_ids.get(exam.id, [])
+            )
+            for exam in exams
+        ]
 
     @staticmethod
     def get_exam(db: Session, exam_id: int):
@@ -142,71 +345,35 @@ class ExamService:
         if "class_ids" in exam_data:
             new_class_ids = exam_data.pop("class_ids")
             
-            # Chỉ xóa và thêm lại nếu new_class_ids là list
+            # Chỉ đồng bộ nếu new_class_ids là list
             if isinstance(new_class_ids, list):
-                db.query(ExamAllowedClass).filter(
-                    ExamAllowedClass.exam_id == exam_id
-                ).delete()
-
-                for cls_id in new_class_ids:
-                    db.add(
-                        ExamAllowedClass(
-                            exam_id=exam_id,
-                            class_id=cls_id
-                        )
-                    )
+                ExamService._sync_allowed_classes(db, exam_id, new_class_ids)
 
         # ---------- questions ----------
         if "questions" in exam_data:
             new_question_ids = exam_data.pop("questions")
 
             if isinstance(new_question_ids, list):
-                # Normalize: unique IDs, keep original order
-                normalized_question_ids = list(dict.fromkeys(new_question_ids))
-
-                if has_results:
-                    # Preserve historic structure for exams that already have attempts:
-                    # only append new questions, do not wipe old links.
-                    existing_ids = {
-                        row[0]
-                        for row in db.query(ExamQuestion.question_id)
-                        .filter(ExamQuestion.exam_id == exam_id)
-                        .all()
-                    }
-                    ids_to_add = [q_id for q_id in normalized_question_ids if q_id not in existing_ids]
-
-                    for q_id in ids_to_add:
-                        db.add(
-                            ExamQuestion(
-                                exam_id=exam_id,
-                                question_id=q_id
-                            )
-                        )
-                else:
-                    db.query(ExamQuestion).filter(
-                        ExamQuestion.exam_id == exam_id
-                    ).delete()
-
-                    for q_id in normalized_question_ids:
-                        db.add(
-                            ExamQuestion(
-                                exam_id=exam_id,
-                                question_id=q_id
-                            )
-                        )
+                # Preserve historic structure for exams that already have attempts:
+                # only append new questions, do not drop old links.
+                ExamService._sync_questions(
+                    db, exam_id, new_question_ids, append_only=has_results
+                )
 
         # ---------- basic fields ----------
         for key, value in exam_data.items():
             if hasattr(db_exam, key):  # Kiểm tra attribute tồn tại
                 setattr(db_exam, key, value)
+        ExamService._bump_revision(db, exam_id)
 
         db.commit()
         db.refresh(db_exam)
+        cache_events.publish(cache_events.EXAM, exam_id)
         return db_exam
 
     @staticmethod
     def set_status(db: Session, exam_id: int, status_value: str):
-        if status_value not in {"draft", "published", "closed"}:
+        if status_value not in ExamService.EXAM_STATUSES:
             raise HTTPException(status_code=400, detail="Invalid exam status")
 
         exam = db.query(Exam).filter(Exam.id == exam_id).first()
@@ -231,8 +398,10 @@ class ExamService:
                 )
 
         exam.status = status_value
+        ExamService._bump_revision(db, exam_id)
         db.commit()
         db.refresh(exam)
+        cache_events.publish(cache_events.EXAM, exam_id)
         return exam
 
     @staticmethod
@@ -249,6 +418,7 @@ class ExamService:
 
         db.delete(db_exam)
         db.commit()
+        cache_events.publish(cache_events.EXAM, exam_id)
         return True
 
     # =====================================================
@@ -276,13 +446,21 @@ class ExamService:
         if exists:
             return exists
 
+        next_position = (
+            db.query(func.coalesce(func.max(ExamQuestion.position), -1) + 1)
+            .filter(ExamQuestion.exam_id == exam_id)
+            .scalar()
+        )
         link = ExamQuestion(
             exam_id=exam_id,
-            question_id=question_id
+            question_id=question_id,
+            position=next_position,
         )
         db.add(link)
+        ExamService._bump_revision(db, exam_id)
         db.commit()
         db.refresh(link)
+        cache_events.publish(cache_events.EXAM, exam_id)
         return link
 
     @staticmethod
@@ -300,7 +478,9 @@ class ExamService:
             return False
 
         db.delete(link)
+        ExamService._bump_revision(db, exam_id)
         db.commit()
+        cache_events.publish(cache_events.EXAM, exam_id)
         return True
 
     @staticmethod
@@ -312,7 +492,7 @@ class ExamService:
             db.query(Question)
             .join(ExamQuestion, Question.id == ExamQuestion.question_id)
             .filter(ExamQuestion.exam_id == exam_id)
-            .order_by(ExamQuestion.id.asc())
+            .order_by(ExamQuestion.position.asc(), ExamQuestion.id.asc())
             .all()
         )
     
@@ -396,32 +576,86 @@ class ExamService:
                     detail=f"Attempt limit reached ({exam.max_attempts})",
                 )
 
-        return ExamService._get_or_create_session(db, exam_id, student_id)
+        state = ExamService._session_state(db, exam_id, student_id)
+        exam_deadlines.schedule(
+            state.id,
+            exam_id,
+            student_id,
+            session_deadline(state.started_at, exam.duration_minutes, exam.end_time),
+        )
+        return state
 
     @staticmethod
-    def autosave_exam_session(db: Session, exam_id: int, student_id: int, answers: dict):
-        session = ExamService._get_or_create_session(db, exam_id, student_id)
-        session.answers = {str(key): value for key, value in answers.items()}
-        session.last_saved_at = datetime.now()
-        db.commit()
-        db.refresh(session)
-        return session
+    def session_closed() -> HTTPException:
+        return HTTPException(status_code=409, detail="Exam session was already submitted")
 
     @staticmethod
-    def log_violation(db: Session, exam_id: int, student_id: int, reason: str):
-        session = ExamService._get_or_create_session(db, exam_id, student_id)
-        violation = ExamViolation(
-            session_id=session.id,
-            exam_id=exam_id,
-            student_id=student_id,
-            reason=reason,
-        )
-        session.violation_count = (session.violation_count or 0) + 1
-        session.last_saved_at = datetime.now()
-        db.add(violation)
-        db.commit()
-        db.refresh(violation)
-        return violation
+    def _session_state(db: Session, exam_id: int, student_id: int) -> SessionState:
+        # Buffered state wins over the row, which may lag behind autosaves.
+        # It is re-checked against the row in case another process submitted
+        # the session or wrote a newer version without the event reaching us.
+        state = exam_session_store.get(exam_id, student_id)
+        if state is not None:
+            state = exam_session_store.validate(db, state)
+        if state is None:
+            state = exam_session_store.track(
+                ExamService._get_or_create_session(db, exam_id, student_id)
+            )
+        return state
+
+    @staticmethod
+    def autosave_exam_session(
+        db: Session,
+        exam_id: int,
+        student_id: int,
+        answers: dict,
+        seq: int | None = None,
+    ):
+        state = ExamService._session_state(db, exam_id, student_id)
+        try:
+            state, _ = exam_session_store.save_answers(db, state, answers, seq)
+        except SessionClosed:
+            raise ExamService.session_closed()
+        return state
+
+    @staticmethod
+    def patch_exam_session_answers(
+        db: Session,
+        exam_id: int,
+        student_id: int,
+        changes: dict,
+        seq: int,
+    ) -> dict:
+        state = ExamService._session_state(db, exam_id, student_id)
+        try:
+            state, applied = exam_session_store.merge_answers(db, state, changes, seq)
+        except SessionClosed:
+            raise ExamService.session_closed()
+        result = {
+            "session_id": state.id,
+            "version": state.answers_version,
+            "applied": applied,
+            "last_saved_at": state.last_saved_at,
+        }
+        if not applied:
+            # Let the client resync from the state that won.
+            result["answers"] = state.answers
+        return result
+
+    @staticmethod
+    def log_violation(db: Session, exam_id: int, student_id: int, reason: str) -> dict:
+        # Queued and written in batches by violation_queue; see its docstring.
+        state = ExamService._session_state(db, exam_id, student_id)
+        queued = violation_queue.enqueue(state.id, exam_id, student_id, reason)
+        if queued:
+            exam_session_store.note_violations(exam_id, student_id)
+        return {
+            "session_id": state.id,
+            "exam_id": exam_id,
+            "student_id": student_id,
+            "reason": reason,
+            "queued": queued,
+        }
 
     @staticmethod
     def get_exam_sessions_for_teacher(db: Session, exam_id: int, teacher_id: int):
@@ -429,6 +663,8 @@ class ExamService:
         if not exam or exam.created_by != teacher_id:
             return None
 
+        exam_session_store.flush_exam(exam_id)
+        violation_queue.flush(exam_id)
         return (
             db.query(ExamSession)
             .options(joinedload(ExamSession.violations))
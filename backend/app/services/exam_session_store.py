@@ -0,0 +1,463 @@
+import dataclasses
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.core import cache_events
+from app.core.background import PeriodicWorker
+from app.core.config import (
+    AUTOSAVE_BUFFER_MAX_SESSIONS,
+    AUTOSAVE_FLUSH_INTERVAL_SECONDS,
+    AUTOSAVE_WRITE_MODE,
+)
+from app.core.metrics import REGISTRY, gauge_lines
+from app.database import SessionLocal
+from app.models.exam_session import ExamSession
+
+
+logger = logging.getLogger(__name__)
+
+AUTOSAVE_FLUSH_LAG = REGISTRY.histogram(
+    "exam_autosave_flush_lag_seconds",
+    "Time from the first unflushed autosave of a session to its write to the database.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0),
+)
+AUTOSAVE_FLUSHED = REGISTRY.counter(
+    "exam_autosave_flushed_sessions_total",
+    "Session rows written by autosave flushes.",
+)
+AUTOSAVE_FLUSH_ERRORS = REGISTRY.counter(
+    "exam_autosave_flush_errors_total",
+    "Autosave flushes that failed and were retried later.",
+)
+AUTOSAVE_CONFLICTS = REGISTRY.counter(
+    "exam_autosave_conflicts_total",
+    "Buffered sessions whose flush matched no open row (submitted elsewhere or newer version).",
+)
+
+# Clean states idle this long are dropped so sessions submitted elsewhere
+# (or whose event was lost) do not linger.
+IDLE_STATE_SECONDS = 600.0
+
+# Optimistic retries of a delta merge racing other writers of the same row.
+MERGE_ATTEMPTS = 5
+
+
+class SessionClosed(Exception):
+    """The session was submitted before the autosave reached the database."""
+
+
+@dataclass
+class SessionState:
+    """Latest known state of an open exam session, possibly not yet in the DB."""
+
+    id: int
+    exam_id: int
+    student_id: int
+    answers: dict[str, str]
+    answers_version: int
+    violation_count: int
+    started_at: datetime | None
+    last_saved_at: datetime | None
+    # monotonic time of the oldest autosave not yet written, None when clean
+    dirty_since: float | None = None
+    touched_at: float = 0.0
+
+    @property
+    def session_id(self) -> int:
+        return self.id
+
+
+class ExamSessionStore:
+    """Write-behind buffer for exam session autosaves.
+
+    Autosaves replace the answers of an in-memory ``SessionState``; the
+    flusher writes every dirty session in one batched UPDATE per interval.
+    ``mode="through"`` writes each autosave immediately instead. At most
+    ``max_sessions`` states are kept; when every slot is dirty, the caller
+    flushes before a new session is admitted.
+
+    A crash loses at most ``flush_interval`` seconds of autosaves in
+    write-behind mode. Only full saves with a ``seq`` are buffered: the
+    version check of the flush orders them across processes. A full save
+    without one is written through, since a buffered copy in another
+    process could overwrite it later. Deltas are merged against the row
+    (see ``merge_answers``); both may reach any process.
+    """
+
+    def __init__(self, mode: str, max_sessions: int, flush_interval: float):
+        if mode not in {"behind", "through"}:
+            raise ValueError(f"Unknown autosave write mode: {mode!r}")
+        self.write_behind = mode == "behind"
+        self.max_sessions = max_sessions
+        self._states: OrderedDict[tuple[int, int], SessionState] = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes flushes so an older snapshot never lands after a newer one.
+        self._flush_lock = threading.Lock()
+        self.flusher = PeriodicWorker("exam-autosave-flusher", flush_interval, self.flush)
+
+    def get(self, exam_id: int, student_id: int) -> SessionState | None:
+        with self._lock:
+            state = self._states.get((exam_id, student_id))
+            if state is None:
+                return None
+            self._states.move_to_end((exam_id, student_id))
+            return dataclasses.replace(state)
+
+    def track(self, session: ExamSession) -> SessionState:
+        """Start buffering an open session loaded from the database."""
+        key = (session.exam_id, session.student_id)
+        state = SessionState(
+            id=session.id,
+            exam_id=session.exam_id,
+            student_id=session.student_id,
+            answers=dict(session.answers or {}),
+            answers_version=session.answers_version or 0,
+            violation_count=session.violation_count or 0,
+            started_at=session.started_at,
+            last_saved_at=session.last_saved_at,
+            touched_at=time.monotonic(),
+        )
+        while True:
+            with self._lock:
+                existing = self._states.get(key)
+                if existing is not None and existing.id == state.id:
+                    return dataclasses.replace(existing)
+                if len(self._states) < self.max_sessions or self._evict_clean():
+                    self._states[key] = state
+                    return dataclasses.replace(state)
+            self.flush()
+
+    def _evict_clean(self) -> bool:
+        for key, state in self._states.items():
+            if state.dirty_since is None:
+                del self._states[key]
+                return True
+        return False
+
+    def save_answers(
+        self, db: Session, tracked: SessionState, answers: dict, seq: int | None = None
+    ) -> tuple[SessionState, bool]:
+        """Replace all answers. Returns the resulting state and whether the
+        write was applied (False when ``seq`` is not newer than the stored
+        version)."""
+        def replace(state: SessionState):
+            state.answers = {str(question_id): value for question_id, value in answers.items()}
+
+        return self._write(db, tracked, replace, seq)
+
+    def merge_answers(
+        self, db: Session, tracked: SessionState, changes: dict, seq: int
+    ) -> tuple[SessionState, bool]:
+        """Apply only changed answers; a ``None`` value clears the answer.
+
+        Deltas for one session may reach different processes, so they are
+        merged into the stored row under a version check rather than into
+        this process's buffer, and always written through.
+        """
+        key = (tracked.exam_id, tracked.student_id)
+        # This process's unwritten autosaves are the base of the merge.
+        self.flush(db, keys=[key])
+        table = ExamSession.__table__
+
+        for _ in range(MERGE_ATTEMPTS):
+            row = db.execute(
+                select(table.c.answers, table.c.answers_version, table.c.last_saved_at, table.c.submitted_at)
+                .where(table.c.id == tracked.id)
+            ).first()
+            if row is None or row.submitted_at is not None:
+                db.rollback()
+                raise SessionClosed(tracked.id)
+
+            version = row.answers_version or 0
+            if seq <= version:
+                db.rollback()
+                return self._replace_clean(tracked, row.answers or {}, version, row.last_saved_at), False
+
+            answers = dict(row.answers or {})
+            for question_id, value in changes.items():
+                if value is None:
+                    answers.pop(str(question_id), None)
+                else:
+                    answers[str(question_id)] = value
+            saved_at = datetime.now()
+            written = db.execute(
+                update(table)
+                .where(
+                    table.c.id == tracked.id,
+                    table.c.submitted_at.is_(None),
+                    table.c.answers_version == version,
+                )
+                .values(answers=answers, answers_version=seq, last_saved_at=saved_at)
+            ).rowcount
+            db.commit()
+            if written:
+                return self._replace_clean(tracked, answers, seq, saved_at), True
+
+        # Every attempt lost a race with another writer; let the client resync.
+        state = self._replace_clean(tracked, row.answers or {}, version, row.last_saved_at)
+        return state, False
+
+    def _replace_clean(
+        self, tracked: SessionState, answers: dict, version: int, saved_at: datetime | None
+    ) -> SessionState:
+        """Buffer the state just read from or written to the row."""
+        key = (tracked.exam_id, tracked.student_id)
+        fresh = dataclasses.replace(
+            tracked,
+            answers=dict(answers),
+            answers_version=version,
+            last_saved_at=saved_at,
+            dirty_since=None,
+            touched_at=time.monotonic(),
+        )
+        with self._lock:
+            state = self._states.get(key)
+            if state is not None and state.id == tracked.id and state.dirty_since is not None:
+                # A full save arrived meanwhile; its flush settles the order.
+                return dataclasses.replace(state)
+            if state is not None and state.id == tracked.id:
+                fresh.violation_count = state.violation_count
+            self._states[key] = fresh
+            return dataclasses.replace(fresh)
+
+    def _write(self, db: Session, tracked: SessionState, mutate, seq: int | None) -> tuple[SessionState, bool]:
+        key = (tracked.exam_id, tracked.student_id)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state.id != tracked.id:
+                # Evicted since it was tracked; it is clean, so re-admit it.
+                state = dataclasses.replace(tracked)
+                self._states[key] = state
+            if seq is not None and seq <= state.answers_version:
+                return dataclasses.replace(state), False
+
+            mutate(state)
+            if seq is not None:
+                state.answers_version = seq
+            state.last_saved_at = datetime.now()
+            state.touched_at = time.monotonic()
+            if state.dirty_since is None:
+                state.dirty_since = state.touched_at
+            snapshot = dataclasses.replace(state)
+
+        write_through = not self.write_behind or seq is None
+        if write_through and self.flush(db, keys=[key]) == 0 and not self.is_open(db, snapshot.id):
+            raise SessionClosed(snapshot.id)
+        return snapshot, True
+
+    def validate(self, db: Session, state: SessionState) -> SessionState | None:
+        """Return ``state`` if it may be reused, else drop it and return None.
+
+        A state is stale when its session was submitted, or when it is clean
+        and another process has written a newer version of the row.
+        """
+        row = db.execute(
+            select(ExamSession.submitted_at, ExamSession.answers_version)
+            .where(ExamSession.id == state.id)
+        ).first()
+        if row is not None and row.submitted_at is None and (
+            state.dirty_since is not None or (row.answers_version or 0) <= state.answers_version
+        ):
+            return state
+        self.discard(state.exam_id, state.student_id, state.id)
+        return None
+
+    @staticmethod
+    def is_open(db: Session, session_id: int) -> bool:
+        return (
+            db.query(ExamSession.id)
+            .filter(ExamSession.id == session_id, ExamSession.submitted_at.is_(None))
+            .first()
+            is not None
+        )
+
+    def note_violations(self, exam_id: int, student_id: int, count: int = 1):
+        with self._lock:
+            state = self._states.get((exam_id, student_id))
+            if state is not None:
+                state.violation_count += count
+
+    def _take_dirty(self, keys) -> list[tuple[tuple[int, int], SessionState]]:
+        with self._lock:
+            candidates = self._states.items() if keys is None else [
+                (key, self._states[key]) for key in keys if key in self._states
+            ]
+            taken = []
+            for key, state in candidates:
+                if state.dirty_since is not None:
+                    taken.append((key, dataclasses.replace(state)))
+                    state.dirty_since = None
+            return taken
+
+    def _restore_dirty(self, taken):
+        with self._lock:
+            for key, snapshot in taken:
+                state = self._states.get(key)
+                if state is not None and state.id == snapshot.id:
+                    if state.dirty_since is None or state.dirty_since > snapshot.dirty_since:
+                        state.dirty_since = snapshot.dirty_since
+
+    def _drop_idle(self):
+        cutoff = time.monotonic() - IDLE_STATE_SECONDS
+        with self._lock:
+            for key in [
+                key for key, state in self._states.items()
+                if state.dirty_since is None and state.touched_at < cutoff
+            ]:
+                del self._states[key]
+
+    def flush(self, db: Session | None = None, keys=None) -> int:
+        """Write dirty sessions (all, or only ``keys``) in one batched UPDATE.
+
+        Returns the number of rows written; sessions that matched no open
+        row are counted as conflicts and dropped so they are reloaded.
+        """
+        with self._flush_lock:
+            taken = self._take_dirty(keys)
+            if not taken:
+                if keys is None:
+                    self._drop_idle()
+                return 0
+
+            table = ExamSession.__table__
+            statement = (
+                update(table)
+                # A submitted session already holds the submitted answers, and
+                # a row written with a newer version (by another process) wins.
+                .where(
+                    table.c.id == bindparam("session_id"),
+                    table.c.submitted_at.is_(None),
+                    table.c.answers_version <= bindparam("version"),
+                )
+                .values(
+                    answers=bindparam("answers"),
+                    answers_version=bindparam("version"),
+                    last_saved_at=bindparam("saved_at"),
+                )
+            )
+            rows = [
+                {
+                    "session_id": state.id,
+                    "answers": state.answers,
+                    "version": state.answers_version,
+                    "saved_at": state.last_saved_at,
+                }
+                for _, state in taken
+            ]
+
+            own_session = db is None
+            db = db or SessionLocal()
+            try:
+                written = db.execute(statement, rows).rowcount
+                db.commit()
+            except Exception:
+                db.rollback()
+                self._restore_dirty(taken)
+                AUTOSAVE_FLUSH_ERRORS.inc()
+                if own_session:
+                    logger.exception("Autosave flush of %d sessions failed", len(taken))
+                    return 0
+                raise
+            finally:
+                if own_session:
+                    db.close()
+
+            if written < 0:
+                # The driver cannot count executemany rows; assume all landed.
+                written = len(rows)
+            elif written < len(rows):
+                # Some rows were submitted or hold a newer version written
+                # elsewhere; reload those sessions from the database.
+                AUTOSAVE_CONFLICTS.inc(len(rows) - written)
+                logger.warning(
+                    "Autosave flush matched %d of %d sessions; dropping them from the buffer",
+                    written, len(rows),
+                )
+                self._drop_clean(taken)
+
+            now = time.monotonic()
+            for _, state in taken:
+                AUTOSAVE_FLUSH_LAG.observe(now - state.dirty_since)
+            AUTOSAVE_FLUSHED.inc(written)
+            return written
+
+    def _drop_clean(self, taken):
+        with self._lock:
+            for key, snapshot in taken:
+                state = self._states.get(key)
+                if state is not None and state.id == snapshot.id and state.dirty_since is None:
+                    del self._states[key]
+
+    def discard(self, exam_id: int, student_id: int, session_id: int):
+        """Drop a buffered session known to be closed, without writing it."""
+        with self._lock:
+            state = self._states.get((exam_id, student_id))
+            if state is not None and state.id == session_id:
+                del self._states[(exam_id, student_id)]
+
+    def forget(self, exam_id: int, student_id: int):
+        """Flush and drop a session that is being submitted."""
+        self.forget_many([(exam_id, student_id)])
+
+    def flush_exam(self, exam_id: int) -> int:
+        """``flush`` for the buffered sessions of one exam."""
+        with self._lock:
+            keys = [key for key in self._states if key[0] == exam_id]
+        return self.flush(keys=keys)
+
+    def forget_many(self, keys: list[tuple[int, int]]):
+        """``forget`` for several (exam_id, student_id) keys with one flush."""
+        self.flush(keys=keys)
+        with self._lock:
+            for key in keys:
+                self._states.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            dirty = [state.dirty_since for state in self._states.values() if state.dirty_since is not None]
+            return {
+                "mode": "behind" if self.write_behind else "through",
+                "sessions": len(self._states),
+                "dirty": len(dirty),
+                "oldest_dirty_seconds": round(time.monotonic() - min(dirty), 3) if dirty else 0.0,
+            }
+
+
+exam_session_store = ExamSessionStore(
+    mode=AUTOSAVE_WRITE_MODE,
+    max_sessions=AUTOSAVE_BUFFER_MAX_SESSIONS,
+    flush_interval=AUTOSAVE_FLUSH_INTERVAL_SECONDS,
+)
+
+
+def _store_metrics() -> list[str]:
+    stats = exam_session_store.stats()
+    return (
+        gauge_lines("exam_autosave_buffered_sessions", "Open sessions held by the autosave buffer.",
+                    {(): stats["sessions"]})
+        + gauge_lines("exam_autosave_dirty_sessions", "Buffered sessions with autosaves not yet written.",
+                      {(): stats["dirty"]})
+        + gauge_lines("exam_autosave_oldest_dirty_seconds", "Age of the oldest unwritten autosave.",
+                      {(): stats["oldest_dirty_seconds"]})
+    )
+
+
+REGISTRY.add_collector(_store_metrics)
+
+
+def _on_exam_session(key: str | None):
+    if key is None:
+        exam_session_store.flush()
+        return
+    exam_id, _, student_id = key.partition(":")
+    exam_session_store.forget(int(exam_id), int(student_id))
+
+
+cache_events.subscribe(cache_events.EXAM_SESSION, _on_exam_session)
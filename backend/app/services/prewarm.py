@@ -0,0 +1,135 @@
+import logging
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core.background import PeriodicWorker
+from app.core.config import PREWARM_INTERVAL_SECONDS, PREWARM_LEAD_SECONDS
+from app.core.metrics import REGISTRY
+from app.database import SessionLocal
+from app.models.exam import Exam
+from app.models.exam_allowed_class import ExamAllowedClass
+from app.services.answer_keys import answer_keys
+from app.services.class_membership import class_membership
+from app.services.exam_access import exam_access
+from app.services.exam_paper import exam_papers
+
+
+logger = logging.getLogger(__name__)
+
+PREWARM_SECONDS = REGISTRY.histogram(
+    "exam_prewarm_seconds",
+    "Time spent warming one cache for the exams about to start.",
+    ("cache",),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+PREWARM_ITEMS = REGISTRY.gauge(
+    "exam_prewarm_items",
+    "Entries held warm by the last prewarm run (papers, classes, students, answer key questions).",
+    ("cache",),
+)
+PREWARM_EXAMS = REGISTRY.gauge(
+    "exam_prewarm_exams",
+    "Published exams inside the prewarm window at the last run.",
+)
+
+# Exams that started this recently are kept warm too: the first minutes
+# after start_time are when most students open them.
+KEEP_WARM_AFTER_START_SECONDS = 300
+
+
+def warm_papers(db: Session, exam_ids: list[int]) -> int:
+    return sum(1 for exam_id in exam_ids if exam_papers.get(db, exam_id) is not None)
+
+
+def warm_access(db: Session, exam_ids: list[int]) -> int:
+    if not exam_access.enabled:
+        return 0
+    return sum(len(exam_access.allowed_class_ids(db, exam_id)) for exam_id in exam_ids)
+
+
+def warm_enrollments(db: Session, exam_ids: list[int]) -> int:
+    class_ids = [
+        row[0]
+        for row in db.query(ExamAllowedClass.class_id)
+        .filter(ExamAllowedClass.exam_id.in_(exam_ids))
+        .distinct()
+        .all()
+    ]
+    return class_membership.preload(db, class_ids)
+
+
+def warm_answer_keys(db: Session, exam_ids: list[int]) -> int:
+    return sum(len(answer_keys.get(db, exam_id)) for exam_id in exam_ids)
+
+
+WARMERS: dict[str, Callable[[Session, list[int]], int]] = {
+    "exam_paper": warm_papers,
+    "exam_access": warm_access,
+    "class_membership": warm_enrollments,
+    "answer_key": warm_answer_keys,
+}
+
+
+class PrewarmScheduler:
+    """Periodically loads the caches used by exams that are about to start.
+
+    Every ``interval`` seconds it finds published exams whose start_time is
+    within ``lead`` seconds (or passed less than five minutes ago) and runs
+    each warmer over them. Warmers go through the normal cache getters, so
+    entries that are still warm cost nothing and expired ones are reloaded.
+    Each process warms only the caches it serves; ``warmers`` picks them.
+    """
+
+    def __init__(self, warmers: list[str], lead: float, interval: float):
+        self.warmers = {name: WARMERS[name] for name in warmers}
+        self.lead = lead
+        self.worker = PeriodicWorker("exam-prewarm", interval, self.run, final_run=False)
+
+    def due_exam_ids(self, db: Session, now: datetime | None = None) -> list[int]:
+        now = now or datetime.now()
+        return [
+            row[0]
+            for row in db.query(Exam.id)
+            .filter(
+                Exam.status == "published",
+                Exam.start_time <= now + timedelta(seconds=self.lead),
+                Exam.start_time >= now - timedelta(seconds=KEEP_WARM_AFTER_START_SECONDS),
+            )
+            .order_by(Exam.start_time.asc())
+            .all()
+        ]
+
+    def run(self) -> dict:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            exam_ids = self.due_exam_ids(db)
+            report = {"exam_ids": exam_ids, "caches": {}}
+            PREWARM_EXAMS.set(len(exam_ids))
+            if exam_ids:
+                for name, warm in self.warmers.items():
+                    warm_started = time.perf_counter()
+                    items = warm(db, exam_ids)
+                    elapsed = time.perf_counter() - warm_started
+                    PREWARM_SECONDS.observe(elapsed, cache=name)
+                    PREWARM_ITEMS.set(items, cache=name)
+                    report["caches"][name] = {"items": items, "seconds": round(elapsed, 4)}
+        finally:
+            db.close()
+
+        report["seconds"] = round(time.perf_counter() - started, 4)
+        report["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        if exam_ids:
+            logger.info(
+                "Prewarmed %d exam(s) %s in %.3fs: %s",
+                len(exam_ids), exam_ids, report["seconds"],
+                ", ".join(f"{name}={info['items']}" for name, info in report["caches"].items()),
+            )
+        return report
+
+
+def create_prewarm_scheduler(warmers: list[str]) -> PrewarmScheduler:
+    return PrewarmScheduler(warmers, lead=PREWARM_LEAD_SECONDS, interval=PREWARM_INTERVAL_SECONDS)
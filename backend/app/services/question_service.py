@@ -5,6 +5,7 @@ from collections import defaultdict
 
 from sqlalchemy.orm import Session
 from sqlalchemy import exists
+from app.core import cache_events
 from app.models.question import Question
 from app.models.question import DifficultyLevel as QuestionDifficultyLevel
 from app.models.teacher import Teacher
@@ -47,6 +48,7 @@ class QuestionService:
         db.add(db_question)
         db.commit()
         db.refresh(db_question)
+        cache_events.publish(cache_events.QUESTION, db_question.id)
         return db_question
 
     @staticmethod
@@ -125,6 +127,7 @@ class QuestionService:
         if imported_questions:
             db.add_all(imported_questions)
             db.commit()
+            cache_events.publish(cache_events.QUESTION)
 
         return {
             "imported_count": len(imported_questions),
@@ -203,9 +206,11 @@ class QuestionService:
             
         for key, value in question_data.items():
             setattr(db_question, key, value)
+        db_question.revision = Question.revision + 1
             
         db.commit()
         db.refresh(db_question)
+        cache_events.publish(cache_events.QUESTION, question_id)
         return db_question
 
     # --- DELETE ---
@@ -215,5 +220,6 @@ class QuestionService:
         if db_question:
             db.delete(db_question)
             db.commit()
+            cache_events.publish(cache_events.QUESTION, question_id)
             return True
         return False
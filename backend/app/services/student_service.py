@@ -1,13 +1,29 @@
+import csv
+import io
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 
+from app.core import cache_events
+from app.core.password_hasher import password_hasher
+from app.models.admin import Admin
+from app.models.class_student import ClassStudent
+from app.models.classroom import Class
 from app.models.student import Student
+from app.models.teacher import Teacher
 from app.schemas.student import StudentCreate, StudentUpdate
 from app.services.account_service import AccountService
 
 
 class StudentService:
+    CODE_PREFIX = "SV"
+    BULK_MAX_ROWS = 5000
+    # Rows per IN (...) lookup when reading back ids and checking conflicts.
+    BULK_LOOKUP_CHUNK = 1000
+
     @staticmethod
     def create_student(db: Session, student_in: StudentCreate) -> Student:
         try:
@@ -34,6 +50,7 @@ class StudentService:
             db.add(student)
             db.commit()
             db.refresh(student)
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("student", student.id))
             return student
         except HTTPException:
             raise
@@ -41,6 +58,143 @@ class StudentService:
             db.rollback()
             AccountService.handle_db_error(e)
 
+    @staticmethod
+    def _bulk_rows(full_names: List[str], csv_content: Optional[str]) -> List[Dict[str, Any]]:
+        if not csv_content:
+            return [{"row": index, "full_name": (name or "").strip()} for index, name in enumerate(full_names, start=1)]
+
+        reader = csv.DictReader(io.StringIO(csv_content.lstrip("\ufeff").strip()))
+        headers = {str(header).strip().lower() for header in reader.fieldnames or [] if header}
+        if "full_name" not in headers:
+            raise ValueError("CSV is missing required columns: full_name")
+
+        rows = []
+        for row_number, raw_row in enumerate(reader, start=2):
+            row = {str(key).strip().lower(): value for key, value in raw_row.items() if key}
+            rows.append({"row": row_number, "full_name": (row.get("full_name") or "").strip()})
+        return rows
+
+    @staticmethod
+    def _taken_codes(db: Session, codes: List[str]) -> set:
+        """Codes already used as a username, email or student code (e.g. set by hand)."""
+        taken = set()
+        for start in range(0, len(codes), StudentService.BULK_LOOKUP_CHUNK):
+            chunk = codes[start:start + StudentService.BULK_LOOKUP_CHUNK]
+            emails = {f"{code}@edu.com": code for code in chunk}
+            for model in (Admin, Teacher, Student):
+                taken.update(
+                    username for (username,) in
+                    db.query(model.username).filter(model.username.in_(chunk)).all()
+                )
+                taken.update(
+                    emails[email] for (email,) in
+                    db.query(model.email).filter(model.email.in_(list(emails))).all()
+                )
+            taken.update(
+                code for (code,) in
+                db.query(Student.student_code).filter(Student.student_code.in_(chunk)).all()
+            )
+        return taken
+
+    @staticmethod
+    def _reserve_free_codes(db: Session, count: int) -> List[str]:
+        codes: List[str] = []
+        while len(codes) < count:
+            numbers = AccountService.reserve_code_numbers(db, StudentService.CODE_PREFIX, count - len(codes))
+            block = [AccountService.format_account_code(StudentService.CODE_PREFIX, number) for number in numbers]
+            taken = StudentService._taken_codes(db, block)
+            codes.extend(code for code in block if code not in taken)
+        return codes
+
+    @staticmethod
+    def create_students_bulk(
+        db: Session,
+        full_names: List[str],
+        csv_content: Optional[str] = None,
+        class_id: Optional[int] = None,
+    ):
+        """Create many students (and optionally enroll them) in one transaction.
+
+        Codes come from one reserved block, passwords are hashed on the
+        hasher pool in parallel and rows are written with multi-row INSERTs.
+        Rows that fail validation are reported and skipped; a database error
+        rolls back the whole batch.
+        """
+        rows = StudentService._bulk_rows(full_names, csv_content)
+        if len(rows) > StudentService.BULK_MAX_ROWS:
+            raise ValueError(f"At most {StudentService.BULK_MAX_ROWS} students per request")
+
+        if class_id is not None and db.query(Class.id).filter(Class.id == class_id).first() is None:
+            raise HTTPException(status_code=404, detail="Class not found")
+
+        results: List[Dict[str, Any]] = []
+        valid_rows = []
+        for row in rows:
+            if not row["full_name"]:
+                results.append({**row, "status": "error", "message": "full_name is required"})
+            elif len(row["full_name"]) > 255:
+                results.append({**row, "status": "error", "message": "full_name is too long"})
+            else:
+                valid_rows.append(row)
+
+        if valid_rows:
+            codes = StudentService._reserve_free_codes(db, len(valid_rows))
+            # Same default password as create_student: "<code>@".
+            hashed_passwords = password_hasher.hash_many_sync([f"{code}@" for code in codes])
+
+            try:
+                db.execute(
+                    insert(Student),
+                    [
+                        {
+                            "username": code,
+                            "email": f"{code}@edu.com",
+                            "password": hashed_password,
+                            "full_name": row["full_name"],
+                            "student_code": code,
+                        }
+                        for row, code, hashed_password in zip(valid_rows, codes, hashed_passwords)
+                    ],
+                )
+
+                ids_by_code = {}
+                for start in range(0, len(codes), StudentService.BULK_LOOKUP_CHUNK):
+                    chunk = codes[start:start + StudentService.BULK_LOOKUP_CHUNK]
+                    ids_by_code.update(
+                        (username, student_id) for student_id, username in
+                        db.query(Student.id, Student.username).filter(Student.username.in_(chunk)).all()
+                    )
+
+                if class_id is not None:
+                    db.execute(
+                        insert(ClassStudent),
+                        [{"class_id": class_id, "student_id": ids_by_code[code]} for code in codes],
+                    )
+                db.commit()
+            except SQLAlchemyError as e:
+                db.rollback()
+                AccountService.handle_db_error(e)
+
+            for row, code in zip(valid_rows, codes):
+                results.append({
+                    **row,
+                    "status": "created",
+                    "id": ids_by_code[code],
+                    "username": code,
+                    "student_code": code,
+                })
+
+            if class_id is not None:
+                cache_events.publish(cache_events.CLASS, class_id)
+
+        results.sort(key=lambda result: result["row"])
+        return {
+            "created_count": len(valid_rows),
+            "total_rows": len(rows),
+            "class_id": class_id,
+            "results": results,
+        }
+
     @staticmethod
     def get_students(db: Session, skip: int = 0, limit: int = 100):
         return db.query(Student).offset(skip).limit(limit).all()
@@ -75,6 +229,7 @@ class StudentService:
         try:
             db.commit()
             db.refresh(student)
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("student", student_id))
             return student
         except SQLAlchemyError as e:
             db.rollback()
@@ -89,6 +244,7 @@ class StudentService:
         try:
             db.delete(student)
             db.commit()
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("student", student_id))
             return True
         except SQLAlchemyError as e:
             db.rollback()
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from fastapi import HTTPException
 
+from app.core import cache_events
 from app.models.teacher import Teacher
 from app.schemas.teacher import TeacherCreate, TeacherUpdate
 from app.services.account_service import AccountService
@@ -31,6 +32,7 @@ class TeacherService:
             db.add(teacher)
             db.commit()
             db.refresh(teacher)
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("teacher", teacher.id))
             return teacher
         except HTTPException:
             raise
@@ -69,6 +71,7 @@ class TeacherService:
         try:
             db.commit()
             db.refresh(teacher)
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("teacher", teacher_id))
             return teacher
         except SQLAlchemyError as e:
             db.rollback()
@@ -83,6 +86,7 @@ class TeacherService:
         try:
             db.delete(teacher)
             db.commit()
+            cache_events.publish(cache_events.ACCOUNT, cache_events.account_key("teacher", teacher_id))
             return True
         except SQLAlchemyError as e:
             db.rollback()
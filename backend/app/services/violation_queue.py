@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import IntegrityError
+
+from app.core.background import PeriodicWorker
+from app.core.config import VIOLATION_FLUSH_INTERVAL_SECONDS, VIOLATION_QUEUE_MAX_ENTRIES
+from app.core.metrics import REGISTRY, gauge_lines
+from app.database import SessionLocal
+from app.models.exam_session import ExamSession
+from app.models.exam_violation import ExamViolation
+
+
+logger = logging.getLogger(__name__)
+
+VIOLATION_EVENTS = REGISTRY.counter(
+    "exam_violation_events_total",
+    "Violation reports received, by outcome (queued, collapsed into a queued one, dropped).",
+    ("outcome",),
+)
+VIOLATION_FLUSH_ROWS = REGISTRY.histogram(
+    "exam_violation_flush_rows",
+    "Violation rows written per flush.",
+    buckets=(1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+VIOLATION_FLUSH_LAG = REGISTRY.histogram(
+    "exam_violation_flush_lag_seconds",
+    "Time from the first report of a queued violation to its write to the database.",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0),
+)
+VIOLATION_FLUSH_ERRORS = REGISTRY.counter(
+    "exam_violation_flush_errors_total",
+    "Violation flushes whose batch write failed and fell back to row-by-row writes.",
+)
+VIOLATION_DISCARDED = REGISTRY.counter(
+    "exam_violation_discarded_total",
+    "Queued violations given up on after repeated write failures.",
+)
+
+# Rows rejected by the database this many times (e.g. the session was
+# deleted) are logged and discarded instead of retried forever.
+MAX_WRITE_ATTEMPTS = 3
+
+
+@dataclass
+class PendingViolation:
+    session_id: int
+    exam_id: int
+    student_id: int
+    reason: str
+    first_seen: datetime
+    queued_at: float
+    occurrences: int = 1
+    attempts: int = 0
+
+
+class ViolationQueue:
+    """In-process queue that batches proctoring violations.
+
+    Reports of the same reason for the same session that arrive before the
+    next flush are collapsed into one row with an ``occurrences`` count. A
+    flush writes all queued rows with one multi-row INSERT and adds the
+    occurrences to ``exam_session.violation_count`` with one batched UPDATE.
+    If that fails, rows are written one by one so a single bad row cannot
+    block the rest; a row rejected ``MAX_WRITE_ATTEMPTS`` times is dropped.
+    At most ``max_entries`` distinct rows are queued, retries included; new
+    ones beyond that are dropped and counted, while repeats of queued ones
+    still count.
+    """
+
+    def __init__(self, max_entries: int, flush_interval: float):
+        self.max_entries = max_entries
+        self._pending: dict[tuple[int, str], PendingViolation] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self.dropped = 0
+        self.flusher = PeriodicWorker("exam-violation-flusher", flush_interval, self.flush)
+
+    def enqueue(self, session_id: int, exam_id: int, student_id: int, reason: str) -> bool:
+        """Queue one report; returns False when it was dropped."""
+        key = (session_id, reason)
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                pending.occurrences += 1
+                outcome = "collapsed"
+            elif len(self._pending) >= self.max_entries:
+                self.dropped += 1
+                outcome = "dropped"
+            else:
+                self._pending[key] = PendingViolation(
+                    session_id=session_id,
+                    exam_id=exam_id,
+                    student_id=student_id,
+                    reason=reason,
+                    first_seen=datetime.now(),
+                    queued_at=time.monotonic(),
+                )
+                outcome = "queued"
+        VIOLATION_EVENTS.inc(outcome=outcome)
+        return outcome != "dropped"
+
+    def _requeue(self, batch: list[PendingViolation]):
+        dropped = 0
+        with self._lock:
+            for pending in batch:
+                key = (pending.session_id, pending.reason)
+                current = self._pending.get(key)
+                if current is None:
+                    if len(self._pending) >= self.max_entries:
+                        dropped += 1
+                        continue
+                    self._pending[key] = pending
+                else:
+                    current.occurrences += pending.occurrences
+                    current.first_seen = min(current.first_seen, pending.first_seen)
+                    current.queued_at = min(current.queued_at, pending.queued_at)
+                    current.attempts = max(current.attempts, pending.attempts)
+            self.dropped += dropped
+        if dropped:
+            VIOLATION_EVENTS.inc(dropped, outcome="dropped")
+
+    @staticmethod
+    def _write(db, batch: list[PendingViolation]):
+        increments: dict[int, int] = {}
+        for pending in batch:
+            increments[pending.session_id] = increments.get(pending.session_id, 0) + pending.occurrences
+
+        sessions = ExamSession.__table__
+        db.execute(
+            insert(ExamViolation),
+            [
+                {
+                    "session_id": pending.session_id,
+                    "exam_id": pending.exam_id,
+                    "student_id": pending.student_id,
+                    "reason": pending.reason,
+                    "occurrences": pending.occurrences,
+                    "created_at": pending.first_seen,
+                }
+                for pending in batch
+            ],
+        )
+        db.execute(
+            update(sessions)
+            .where(sessions.c.id == bindparam("session_id"))
+            .values(violation_count=sessions.c.violation_count + bindparam("occurrences")),
+            [
+                {"session_id": session_id, "occurrences": occurrences}
+                for session_id, occurrences in increments.items()
+            ],
+        )
+        db.commit()
+
+    def _write_one_by_one(self, db, batch: list[PendingViolation]) -> list[PendingViolation]:
+        """Fallback after a failed batch; returns the rows written."""
+        written = []
+        for index, pending in enumerate(batch):
+            try:
+                self._write(db, [pending])
+            except IntegrityError:
+                db.rollback()
+                pending.attempts += 1
+                if pending.attempts >= MAX_WRITE_ATTEMPTS:
+                    VIOLATION_DISCARDED.inc()
+                    logger.error(
+                        "Discarding violation %r of session %d after %d rejected writes",
+                        pending.reason, pending.session_id, pending.attempts,
+                    )
+                else:
+                    self._requeue([pending])
+            except Exception:
+                # Not about this row (the database is likely unreachable):
+                # keep it and everything after it for the next flush.
+                db.rollback()
+                self._requeue(batch[index:])
+                logger.exception("Violation flush failed; %d rows kept for retry", len(batch) - index)
+                break
+            else:
+                written.append(pending)
+        return written
+
+    def flush(self, exam_id: int | None = None) -> int:
+        """Write the queued rows (all, or only those of ``exam_id``)."""
+        with self._flush_lock:
+            with self._lock:
+                if exam_id is None:
+                    batch = list(self._pending.values())
+                    self._pending = {}
+                else:
+                    keys = [key for key, pending in self._pending.items() if pending.exam_id == exam_id]
+                    batch = [self._pending.pop(key) for key in keys]
+            if not batch:
+                return 0
+
+            db = SessionLocal()
+            try:
+                try:
+                    self._write(db, batch)
+                    written = batch
+                except Exception:
+                    db.rollback()
+                    VIOLATION_FLUSH_ERRORS.inc()
+                    logger.warning("Violation batch of %d rows failed; writing rows one by one", len(batch))
+                    written = self._write_one_by_one(db, batch)
+            finally:
+                db.close()
+
+            if written:
+                now = time.monotonic()
+                for pending in written:
+                    VIOLATION_FLUSH_LAG.observe(now - pending.queued_at)
+                VIOLATION_FLUSH_ROWS.observe(len(written))
+            return len(written)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "max_entries": self.max_entries,
+                "dropped": self.dropped,
+            }
+
+
+violation_queue = ViolationQueue(
+    max_entries=VIOLATION_QUEUE_MAX_ENTRIES,
+    flush_interval=VIOLATION_FLUSH_INTERVAL_SECONDS,
+)
+
+
+def _queue_metrics() -> list[str]:
+    return gauge_lines(
+        "exam_violation_queue_depth",
+        "Distinct violations queued and not yet written.",
+        {(): violation_queue.stats()["pending"]},
+    )
+
+
+REGISTRY.add_collector(_queue_metrics)
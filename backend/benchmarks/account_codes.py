@@ -0,0 +1,105 @@
+"""Account code allocation cost versus number of existing accounts.
+
+Run from the backend directory:
+
+    python -m benchmarks.account_codes                       # 1k, 10k, 100k students
+    python -m benchmarks.account_codes --sizes 100000 --allocations 500
+    python -m benchmarks.account_codes --database-url mysql+pymysql://user:pw@host/scratch_db
+
+Each size gets a fresh schema filled with SV-prefixed students, then times
+the old allocation (scan every matching username, then probe) against the
+account_code_sequence counter. Use a scratch database: tables are dropped.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.models.student import Student
+from app.services.account_service import AccountService
+
+
+def legacy_generate_account_code(db: Session, prefix: str) -> str:
+    """The allocation used before account_code_sequence existed."""
+    number = AccountService._max_existing_code_number(db, prefix) + 1
+    while True:
+        code = AccountService.format_account_code(prefix, number)
+        if not AccountService.find_by_username(db, code):
+            return code
+        number += 1
+
+
+def populate(engine, size: int, batch: int = 5000):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for start in range(1, size + 1, batch):
+            rows = []
+            for number in range(start, min(start + batch, size + 1)):
+                code = AccountService.format_account_code("SV", number)
+                rows.append({
+                    "username": code,
+                    "email": f"{code}@edu.com",
+                    "password": "x",
+                    "full_name": f"Student {number}",
+                    "student_code": code,
+                })
+            conn.execute(insert(Student), rows)
+
+
+def time_per_call(fn, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1000, 10000, 100000])
+    parser.add_argument("--allocations", type=int, default=200)
+    parser.add_argument("--legacy-allocations", type=int, default=5)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    scratch = None
+    if args.database_url:
+        url = args.database_url
+    else:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        url = f"sqlite:///{scratch.name}"
+    engine = create_engine(url)
+
+    print(f"{'accounts':>9} | {'scan + probe':>14} | {'sequence':>10} | {'block of 1000':>14}")
+    try:
+        for size in args.sizes:
+            populate(engine, size)
+            with Session(bind=engine) as db:
+                legacy = time_per_call(
+                    lambda: legacy_generate_account_code(db, "SV"), args.legacy_allocations
+                )
+                # The first call seeds the counter from existing usernames.
+                AccountService.reserve_code_numbers(db, "SV")
+                sequence = time_per_call(
+                    lambda: AccountService.reserve_code_numbers(db, "SV"), args.allocations
+                )
+                block = time_per_call(
+                    lambda: AccountService.reserve_code_numbers(db, "SV", 1000), 20
+                )
+            print(
+                f"{size:>9} | {legacy * 1000:11.2f} ms | {sequence * 1000:7.2f} ms"
+                f" | {block * 1000:11.2f} ms"
+            )
+    finally:
+        engine.dispose()
+        if scratch is not None:
+            os.unlink(scratch.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Login throughput versus number of bcrypt worker processes.
+
+Run from the backend directory:
+
+    python -m benchmarks.login_throughput                 # hasher only, 1..N workers
+    python -m benchmarks.login_throughput --workers 1 2 4 --logins 400
+    python -m benchmarks.login_throughput --url http://127.0.0.1:8100 \
+        --username SV000001 --password SV000001@ --logins 500 --concurrency 100
+
+Without --url every worker count gets a fresh PasswordHasher and verifies
+--logins passwords with --concurrency requests in flight, which is the
+bcrypt ceiling of one process. With --url real /login requests are sent to
+a running gateway or auth service; set PASSWORD_HASH_WORKERS on the server
+and re-run to compare.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import bcrypt
+
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+async def _drive(concurrency: int, total: int, attempt) -> tuple[float, list[float], int]:
+    latencies: list[float] = []
+    rejected = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal rejected
+        for _ in remaining:
+            started = time.perf_counter()
+            ok = await attempt()
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                rejected += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - started, latencies, rejected
+
+
+def _report(label: str, elapsed: float, latencies: list[float], rejected: int):
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+    print(
+        f"{label:>12} | {len(latencies) / elapsed:8.1f} logins/s"
+        f" | p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f} ms"
+        f" | p95 {p95 * 1000:7.1f} ms | rejected {rejected}"
+    )
+
+
+async def bench_hasher(worker_counts: list[int], logins: int, concurrency: int):
+    hashed = bcrypt.hashpw(b"benchmark-password", bcrypt.gensalt()).decode("utf-8")
+    print(f"bcrypt cost {hashed.split('$')[2]}, {os.cpu_count()} CPU cores")
+
+    for workers in worker_counts:
+        hasher = PasswordHasher(workers=workers, max_queue=max(concurrency, 1))
+        hasher.start()
+
+        async def attempt():
+            try:
+                return await hasher.verify("benchmark-password", hashed)
+            except PasswordHasherBusy:
+                return False
+
+        elapsed, latencies, rejected = await _drive(concurrency, logins, attempt)
+        hasher.stop()
+        _report(f"{workers} workers", elapsed, latencies, rejected)
+
+
+async def bench_http(url: str, username: str, password: str, logins: int, concurrency: int):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        async def attempt():
+            response = await client.post("/login", json={"username": username, "password": password})
+            return response.status_code == 200
+
+        elapsed, latencies, rejected = await _drive(concurrency, logins, attempt)
+    _report("http", elapsed, latencies, rejected)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    cores = os.cpu_count() or 1
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, 2, max(cores // 2, 1), cores}))
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--url")
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_http(args.url, args.username, args.password, args.logins, args.concurrency))
+    else:
+        asyncio.run(bench_hasher(args.workers, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
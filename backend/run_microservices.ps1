@@ -1,3 +1,8 @@
+param(
+    # Run every service inside the gateway process (ASGI dispatch, no HTTP hop).
+    [switch]$InProcess
+)
+
 $ErrorActionPreference = "Stop"
 
 $services = @(
@@ -10,6 +15,11 @@ $services = @(
     @{ Name = "result-service"; App = "services.result_service.main:app"; Port = 8106 }
 )
 
+if ($InProcess) {
+    $env:GATEWAY_INPROCESS_SERVICES = "all"
+    $services = @($services[0])
+}
+
 $python = "python"
 $localPython = Join-Path $PSScriptRoot "venv\Scripts\python.exe"
 if (Test-Path $localPython) {
@@ -1,3 +1,4 @@
+from app.core.password_hasher import password_hasher
 from app.routers.auth import router as auth_router
 from app.service_factory import create_service_app
 
@@ -6,4 +7,5 @@ app = create_service_app(
     title="Auth Service",
     routers=[auth_router],
     create_tables=True,
+    workers=[password_hasher],
 )
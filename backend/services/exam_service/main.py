@@ -1,8 +1,18 @@
 from app.routers.exams import router as exam_router
 from app.service_factory import create_service_app
+from app.services.exam_deadlines import exam_deadlines
+from app.services.exam_session_store import exam_session_store
+from app.services.prewarm import create_prewarm_scheduler
+from app.services.violation_queue import violation_queue
 
 
 app = create_service_app(
     title="Exam Service",
     routers=[exam_router],
+    workers=[
+        exam_session_store.flusher,
+        violation_queue.flusher,
+        exam_deadlines.worker,
+        create_prewarm_scheduler(["exam_paper", "exam_access", "class_membership"]).worker,
+    ],
 )
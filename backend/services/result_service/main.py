@@ -1,8 +1,10 @@
 from app.routers.results import router as result_router
 from app.service_factory import create_service_app
+from app.services.prewarm import create_prewarm_scheduler
 
 
 app = create_service_app(
     title="Result Service",
     routers=[result_router],
+    workers=[create_prewarm_scheduler(["class_membership", "answer_key"]).worker],
 )
@@ -1,3 +1,4 @@
+from app.core.password_hasher import password_hasher
 from app.routers.admins import router as admin_router
 from app.routers.students import router as student_router
 from app.routers.teachers import router as teacher_router
@@ -11,4 +12,5 @@ app = create_service_app(
         teacher_router,
         student_router,
     ],
+    workers=[password_hasher],
 )
@@ -0,0 +1,78 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.upstream import (
+    BalancerSettings,
+    CircuitBreaker,
+    UpstreamGroup,
+    UpstreamLimits,
+    UpstreamPoolTimeout,
+)
+
+
+def _half_open_group(handler, limits: UpstreamLimits | None = None) -> UpstreamGroup:
+    group = UpstreamGroup(
+        "svc",
+        ["http://replica"],
+        limits or UpstreamLimits(),
+        BalancerSettings(retry_attempts=0, failure_threshold=1, reset_timeout=0, health_check_interval=0),
+        transport=httpx.MockTransport(handler),
+    )
+    # Open the breaker; with reset_timeout=0 the next pick is the trial.
+    group.replicas[0].breaker.record_failure()
+    return group
+
+
+def test_cancelled_trial_lets_the_next_request_through():
+    async def scenario():
+        reached, never = asyncio.Event(), asyncio.Event()
+
+        async def handler(request):
+            reached.set()
+            await never.wait()
+
+        group = _half_open_group(handler)
+        await group.start()
+        breaker = group.replicas[0].breaker
+        try:
+            task = asyncio.create_task(group.request("GET", "/slow"))
+            await reached.wait()
+            assert breaker.trial_in_flight
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            assert breaker.state == CircuitBreaker.HALF_OPEN
+            assert not breaker.trial_in_flight
+            assert group.pick() is group.replicas[0]
+        finally:
+            await group.close()
+
+    asyncio.run(scenario())
+
+
+def test_pool_timeout_fails_the_trial():
+    async def scenario():
+        async def handler(request):
+            return httpx.Response(200)
+
+        group = _half_open_group(handler, UpstreamLimits(max_connections=1, pool_timeout=0.01))
+        await group.start()
+        replica = group.replicas[0]
+        try:
+            await replica._slots.acquire()
+            with pytest.raises(UpstreamPoolTimeout):
+                await group.request("GET", "/busy")
+            assert replica.breaker.state == CircuitBreaker.OPEN
+            assert not replica.breaker.trial_in_flight
+
+            replica._slots.release()
+            response = await group.request("GET", "/ok")
+            assert response.status_code == 200
+            assert replica.breaker.state == CircuitBreaker.CLOSED
+        finally:
+            await group.close()
+
+    asyncio.run(scenario())